@@ -0,0 +1,70 @@
+"""
+The account making a request (request.actor).
+
+Clients and professionals log in by phone or Google and are identified by
+client_id / professional_id in the session. ActorMiddleware puts a lazy
+Actor on every request; the first access loads the session's accounts (one
+query each, only ACTOR_FIELDS) and later accesses reuse them:
+
+    client = request.actor.client              # Client or None
+    professional = request.actor.professional  # Professional or None
+
+Blocked or deleted accounts resolve to None and their session keys are
+removed, so every view that needs a logged-in account gets the same check.
+"""
+from django.contrib import messages
+
+from .models import Client, Professional
+
+
+# Columns loaded for the logged-in accounts (other fields are deferred)
+CLIENT_FIELDS = ('id', 'name', 'email', 'phone_number', 'is_blocked')
+PROFESSIONAL_FIELDS = ('id', 'name', 'email', 'phone_number', 'contact_mode', 'is_activated', 'is_blocked')
+
+# Session keys of each kind of account
+SESSION_KEYS = {
+    'client': ('client_id', 'client_name'),
+    'professional': ('professional_id', 'professional_name'),
+}
+
+
+class Actor:
+    """Accounts logged in on the session (either, both or none)"""
+    __slots__ = ('client', 'professional')
+
+    def __init__(self, client=None, professional=None):
+        self.client = client
+        self.professional = professional
+
+    def __bool__(self):
+        return self.client is not None or self.professional is not None
+
+    def __repr__(self):
+        return f'<Actor client={self.client and self.client.pk} professional={self.professional and self.professional.pk}>'
+
+
+def _load(request, kind, model, fields):
+    id_key = SESSION_KEYS[kind][0]
+    account_id = request.session.get(id_key)
+    if not account_id:
+        return None
+
+    account = model.objects.only(*fields).filter(pk=account_id).first()
+    if account is not None and not account.is_blocked:
+        return account
+
+    for key in SESSION_KEYS[kind]:
+        request.session.pop(key, None)
+    if account is not None:
+        messages.error(request, 'A sua conta está bloqueada. Contacte o suporte para mais informações.')
+    return None
+
+
+def resolve_actor(request):
+    """Load the accounts of the request's session (see ActorMiddleware for the lazy version)"""
+    if getattr(request, 'session', None) is None:
+        return Actor()
+    return Actor(
+        client=_load(request, 'client', Client, CLIENT_FIELDS),
+        professional=_load(request, 'professional', Professional, PROFESSIONAL_FIELDS),
+    )
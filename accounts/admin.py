@@ -2,7 +2,10 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
-from .models import Client, Professional, PortfolioItem, ProfileView, Report
+from django.db.models import Count
+from core.exports import make_export_actions
+from core.pagination import EstimatedCountPaginator
+from .models import Client, Professional, PortfolioItem, ProfileView, Report, AvailabilityRule, AvailabilityException
 
 
 class PortfolioItemInline(admin.TabularInline):
@@ -11,6 +14,18 @@ class PortfolioItemInline(admin.TabularInline):
     fields = ['image', 'description', 'service_category']
 
 
+class AvailabilityRuleInline(admin.TabularInline):
+    model = AvailabilityRule
+    extra = 0
+    fields = ['weekday', 'start_time', 'end_time']
+
+
+class AvailabilityExceptionInline(admin.TabularInline):
+    model = AvailabilityException
+    extra = 0
+    fields = ['date', 'start_time', 'end_time', 'is_available', 'reason']
+
+
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
     list_display = ['name', 'phone_number', 'email', 'is_verified', 'is_blocked', 'report_count', 'booking_count', 'created_at']
@@ -18,13 +33,17 @@ class ClientAdmin(admin.ModelAdmin):
     search_fields = ['name', 'phone_number', 'email']
     readonly_fields = ['created_at', 'updated_at']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_booking_count=Count('bookings'))
+    
     def booking_count(self, obj):
-        count = obj.bookings.count()
+        count = obj._booking_count
         if count > 0:
             url = reverse('admin:bookings_booking_changelist')
             return format_html('<a href="{}?client__id__exact={}">{} reservas</a>', url, obj.id, count)
         return '0 reservas'
     booking_count.short_description = 'Reservas'
+    booking_count.admin_order_field = '_booking_count'
 
 
 @admin.register(Professional)
@@ -48,12 +67,13 @@ class ProfessionalAdmin(admin.ModelAdmin):
         'total_bookings', 
         'completed_bookings', 
         'average_rating',
+        'rating_count',
         'activated_at',
         'last_seen',
         'report_count'
     ]
     filter_horizontal = ['service_provinces', 'service_cities', 'service_neighborhoods']
-    inlines = [PortfolioItemInline]
+    inlines = [PortfolioItemInline, AvailabilityRuleInline, AvailabilityExceptionInline]
     
     fieldsets = (
         ('Informações Pessoais', {
@@ -84,6 +104,7 @@ class ProfessionalAdmin(admin.ModelAdmin):
                 'total_bookings',
                 'completed_bookings', 
                 'average_rating',
+                'rating_count',
                 'report_count'
             ),
             'classes': ('collapse',)
@@ -100,6 +121,9 @@ class ProfessionalAdmin(admin.ModelAdmin):
     
     actions = ['activate_professionals', 'deactivate_professionals']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_booking_count=Count('bookings'))
+    
     def rating_display(self, obj):
         if obj.average_rating > 0:
             stars = '★' * int(obj.average_rating)
@@ -113,12 +137,13 @@ class ProfessionalAdmin(admin.ModelAdmin):
     rating_display.short_description = 'Avaliação'
     
     def booking_count(self, obj):
-        count = obj.bookings.count()
+        count = obj._booking_count
         if count > 0:
             url = reverse('admin:bookings_booking_changelist')
             return format_html('<a href="{}?professional__id__exact={}">{} reservas</a>', url, obj.id, count)
         return '0 reservas'
     booking_count.short_description = 'Reservas'
+    booking_count.admin_order_field = '_booking_count'
     
     def activate_professionals(self, request, queryset):
         from django.utils import timezone
@@ -138,7 +163,13 @@ class ProfessionalAdmin(admin.ModelAdmin):
     activate_professionals.short_description = 'Ativar profissionais selecionados'
     
     def deactivate_professionals(self, request, queryset):
+        from services.search_index import reindex_professionals
+        
+        # Taken before the update: the changelist filters (e.g. is_activated) may no longer match after it
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(is_activated=False)
+        # queryset.update() skips signals, so drop them from the search index explicitly
+        reindex_professionals(ids)
         self.message_user(request, f'{updated} profissionais desativados.')
     deactivate_professionals.short_description = 'Desativar profissionais selecionados'
 
@@ -148,6 +179,7 @@ class PortfolioItemAdmin(admin.ModelAdmin):
     list_display = ['professional', 'service_category', 'created_at']
     list_filter = ['service_category', 'created_at']
     search_fields = ['professional__name', 'description']
+    list_select_related = ['professional', 'service_category']
 
 
 @admin.register(ProfileView)
@@ -157,6 +189,11 @@ class ProfileViewAdmin(admin.ModelAdmin):
     search_fields = ['professional__name', 'ip_address']
     readonly_fields = ['professional', 'ip_address', 'user_agent', 'created_at']
     date_hierarchy = 'created_at'
+    list_select_related = ['professional']
+    # Large table: estimated total instead of COUNT(*)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = make_export_actions('profile_views')
     
     def has_add_permission(self, request):
         return False  # Views são criadas automaticamente
@@ -183,6 +220,7 @@ class ReportAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'created_at'
+    list_select_related = ['reported_professional', 'reported_client', 'reporter_client', 'reporter_professional']
     
     fieldsets = (
         ('Informações da Denúncia', {
@@ -202,7 +240,7 @@ class ReportAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_resolved', 'mark_dismissed', 'block_reported_user']
+    actions = ['mark_resolved', 'mark_dismissed', 'block_reported_user'] + make_export_actions('reports')
     
     def get_reported(self, obj):
         reported = obj.reported_professional or obj.reported_client
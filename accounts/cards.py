@@ -0,0 +1,71 @@
+"""
+Read model of professional listings.
+
+Listing pages only show a card per professional (photo, name, rating,
+counters, presence, bio and contact button), so they don't load Professional
+instances: the rows are projected with .values() onto CARD_FIELDS and turned
+into ProfessionalCard objects. Columns such as nif, iban, google_id or
+activation_notes are never fetched, and a card costs a small slotted object
+instead of a model instance with its state.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models.fields.files import FieldFile
+
+from .models import Professional
+
+
+CARD_FIELDS = (
+    'id', 'name', 'bio', 'contact_mode', 'phone_number',
+    'profile_picture', 'profile_picture_width', 'profile_picture_height', 'profile_picture_renditions',
+    'average_rating', 'completed_bookings', 'last_seen', 'updated_at',
+)
+
+
+@dataclass(slots=True)
+class ProfessionalCard:
+    """What a listing shows of a professional (same attribute names as Professional)"""
+    id: int
+    name: str
+    bio: str | None
+    contact_mode: str
+    phone_number: str  # only kept for direct contact (WhatsApp button)
+    profile_picture: FieldFile
+    profile_picture_width: int | None
+    profile_picture_height: int | None
+    profile_picture_renditions: dict
+    average_rating: Decimal
+    completed_bookings: int
+    last_seen: datetime | None
+    updated_at: datetime
+
+    # Presence and contact helpers only read the fields above
+    is_online = Professional.is_online
+    get_last_seen_display = Professional.get_last_seen_display
+    get_whatsapp_number = Professional.get_whatsapp_number
+
+    @property
+    def pk(self):
+        return self.id
+
+
+def card_fields(prefix=''):
+    """Names to pass to .values(), prefix='professional__' when projecting through a relation"""
+    return [f'{prefix}{name}' for name in CARD_FIELDS]
+
+
+def build_cards(rows, prefix=''):
+    """ProfessionalCard objects from .values() rows of card_fields(prefix)"""
+    picture_field = Professional._meta.get_field('profile_picture')
+    cards = []
+    for row in rows:
+        values = {name: row[f'{prefix}{name}'] for name in CARD_FIELDS}
+        values['profile_picture'] = picture_field.attr_class(None, picture_field, values['profile_picture'] or None)
+        values['profile_picture_renditions'] = values['profile_picture_renditions'] or {}
+        if values['contact_mode'] != 'direct':
+            values['phone_number'] = ''
+        cards.append(ProfessionalCard(**values))
+    return cards
+
@@ -158,6 +158,12 @@ class ProfessionalRegistrationStep3Form(forms.Form):
         help_text="Selecione as cidades específicas (opcional)"
     )
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Render the checkboxes from the cached catalog (the queryset is only used to validate)
+        from services.catalog import category_choices
+        self.fields['service_categories'].choices = category_choices()
+    
     def clean_service_categories(self):
         categories = self.cleaned_data.get('service_categories')
         if not categories or len(categories) == 0:
@@ -0,0 +1,34 @@
+"""
+Management command to roll up profile views into daily totals
+Run daily (e.g. Railway cron): python manage.py rollup_profile_views
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accounts.profile_views import rollup_profile_views, prune_profile_views
+
+
+class Command(BaseCommand):
+    help = 'Roll up raw profile views into daily totals and prune old raw rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=getattr(settings, 'PROFILE_VIEW_RETENTION_DAYS', 90),
+            help='Keep raw profile views for this many days after they are rolled up',
+        )
+        parser.add_argument(
+            '--no-prune',
+            action='store_true',
+            help='Only roll up, do not delete raw rows',
+        )
+
+    def handle(self, *args, **options):
+        rows = rollup_profile_views()
+        self.stdout.write(self.style.SUCCESS(f'✅ {rows} daily totals written'))
+        
+        if options['no_prune']:
+            return
+        
+        deleted = prune_profile_views(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(f'🧹 {deleted} raw profile views pruned'))
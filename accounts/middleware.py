@@ -0,0 +1,30 @@
+"""
+Middleware for client and professional accounts
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .actors import resolve_actor
+from .presence import touch
+
+
+class ActorMiddleware:
+    """
+    Set request.actor (see accounts.actors), loaded on first access, and record
+    activity of the logged-in professional on every request (see accounts.presence).
+    Must come after SessionMiddleware and MessageMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.actor = SimpleLazyObject(lambda: resolve_actor(request))
+        response = self.get_response(request)
+        # Read after the view so the login request itself counts as activity
+        # (and a professional logged out as blocked doesn't)
+        session = getattr(request, 'session', None)
+        if session is not None:
+            professional_id = session.get('professional_id')
+            if professional_id:
+                touch(professional_id)
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_profileview_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_profile_views', to='accounts.professional')),
+            ],
+            options={
+                'verbose_name': 'Visualizações Diárias',
+                'verbose_name_plural': 'Visualizações Diárias',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='accounts_pr_date_39142f_idx')],
+                'unique_together': {('professional', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:54
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_counters(apps, schema_editor):
+    """Initialize the counters (and average) from approved reviews"""
+    Professional = apps.get_model('accounts', 'Professional')
+    Review = apps.get_model('reviews', 'Review')
+    
+    totals = Review.objects.filter(is_approved=True).values('booking__professional_id').annotate(
+        total=Sum('rating'), count=Count('id')
+    )
+    for row in totals:
+        average = (Decimal(row['total']) / row['count']).quantize(Decimal('0.01'))
+        Professional.objects.filter(pk=row['booking__professional_id']).update(
+            rating_sum=row['total'],
+            rating_count=row['count'],
+            average_rating=average,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_profileviewdaily'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='professional',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='professional',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_professional_rating_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')], verbose_name='Dia da semana')),
+                ('start_time', models.TimeField(verbose_name='Início')),
+                ('end_time', models.TimeField(verbose_name='Fim')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_rules', to='accounts.professional')),
+            ],
+            options={
+                'verbose_name': 'Horário de Disponibilidade',
+                'verbose_name_plural': 'Horários de Disponibilidade',
+                'ordering': ['professional', 'weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AvailabilityException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('start_time', models.TimeField(blank=True, help_text='Vazio = dia inteiro', null=True, verbose_name='Início')),
+                ('end_time', models.TimeField(blank=True, help_text='Vazio = dia inteiro', null=True, verbose_name='Fim')),
+                ('is_available', models.BooleanField(default=False, help_text='Desmarcado = indisponível (folga); marcado = horário extra', verbose_name='Disponível')),
+                ('reason', models.CharField(blank=True, default='', max_length=200, verbose_name='Motivo')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_exceptions', to='accounts.professional')),
+            ],
+            options={
+                'verbose_name': 'Exceção de Disponibilidade',
+                'verbose_name_plural': 'Exceções de Disponibilidade',
+                'ordering': ['professional', 'date', 'start_time'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='availabilityrule',
+            constraint=models.CheckConstraint(check=models.Q(('end_time__gt', models.F('start_time'))), name='availability_rule_end_after_start'),
+        ),
+        migrations.AddIndex(
+            model_name='availabilityexception',
+            index=models.Index(fields=['professional', 'date'], name='accounts_av_profess_53d8ca_idx'),
+        ),
+    ]
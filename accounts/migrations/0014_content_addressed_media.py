@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:17
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='portfolioitem',
+            name='image',
+            field=models.ImageField(storage=core.storage.media_storage, upload_to='professionals/portfolio/'),
+        ),
+        migrations.AlterField(
+            model_name='professional',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.media_storage, upload_to='professionals/profile_pics/'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
+from core.storage import media_storage
 from locations.models import Province, City, Neighborhood
 
 
@@ -41,7 +43,11 @@ class Professional(models.Model):
     iban = models.CharField(max_length=34, verbose_name="IBAN", blank=True, default='')
     
     # Profile
-    profile_picture = models.ImageField(upload_to='professionals/profile_pics/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='professionals/profile_pics/', blank=True, null=True, storage=media_storage)
+    # Filled by the rendition pipeline (core.images) after upload
+    profile_picture_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    profile_picture_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(blank=True, null=True)
     
     # Activation
@@ -71,6 +77,9 @@ class Professional(models.Model):
     total_bookings = models.IntegerField(default=0)
     completed_bookings = models.IntegerField(default=0)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    # Running totals of approved reviews (average_rating = rating_sum / rating_count)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
     
     # Online status
     last_seen = models.DateTimeField(null=True, blank=True, verbose_name="Última vez online")
@@ -93,12 +102,10 @@ class Professional(models.Model):
         return f"{self.name} ({self.phone_number}) - {status}"
     
     def update_rating(self):
-        """Recalculate average rating from reviews"""
-        from reviews.models import Review
-        reviews = Review.objects.filter(booking__professional=self, booking__status='completed')
-        if reviews.exists():
-            self.average_rating = reviews.aggregate(models.Avg('rating'))['rating__avg'] or 0.00
-            self.save(update_fields=['average_rating'])
+        """Recalculate rating counters from approved reviews (repair path, reviews update them incrementally)"""
+        from reviews.ratings import recompute_ratings
+        recompute_ratings([self.pk])
+        self.refresh_from_db(fields=['rating_sum', 'rating_count', 'average_rating'])
     
     def get_whatsapp_number(self):
         """Returns phone number formatted for WhatsApp URL (without + and spaces)"""
@@ -107,24 +114,47 @@ class Professional(models.Model):
         return phone_str.replace('+', '').replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
     
     def get_profile_views_count(self, period='all'):
-        """Get profile views count for a specific period"""
+        """
+        Get profile views count for a specific period.
+        
+        Complete days come from the ProfileViewDaily rollup, only the days not yet rolled up
+        (normally just today) are counted from raw ProfileView rows. Windows are day-aligned:
+        'week' means today plus the previous 7 days.
+        """
         from django.utils import timezone
         from datetime import timedelta
+        from .profile_views import start_of_day, last_rolled_up_day
         
-        now = timezone.now()
+        today = timezone.localdate()
         
         if period == 'today':
-            start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            return self.profile_views.filter(created_at__gte=start_of_day(today)).count()
         elif period == 'week':
-            start_date = now - timedelta(days=7)
+            start_day = today - timedelta(days=7)
         elif period == 'month':
-            start_date = now - timedelta(days=30)
+            start_day = today - timedelta(days=30)
         elif period == 'year':
-            start_date = now - timedelta(days=365)
+            start_day = today - timedelta(days=365)
         else:  # 'all'
-            return self.profile_views.count()
+            start_day = None
         
-        return self.profile_views.filter(created_at__gte=start_date).count()
+        rolled_until = last_rolled_up_day()
+        if rolled_until is None:
+            tail_start = start_day
+            rolled = 0
+        else:
+            buckets = self.daily_profile_views.filter(date__lte=rolled_until)
+            if start_day:
+                buckets = buckets.filter(date__gte=start_day)
+            rolled = buckets.aggregate(total=models.Sum('views'))['total'] or 0
+            tail_start = rolled_until + timedelta(days=1)
+            if start_day and start_day > tail_start:
+                tail_start = start_day
+        
+        tail = self.profile_views.all()
+        if tail_start:
+            tail = tail.filter(created_at__gte=start_of_day(tail_start))
+        return rolled + tail.count()
     
     def is_online(self):
         """Check if professional is currently online (active in last 10 minutes)"""
@@ -132,11 +162,9 @@ class Professional(models.Model):
             return False
         
         from django.utils import timezone
-        from datetime import timedelta
+        from .presence import ONLINE_WINDOW
         
-        now = timezone.now()
-        ten_minutes_ago = now - timedelta(minutes=10)
-        return self.last_seen >= ten_minutes_ago
+        return self.last_seen >= timezone.now() - ONLINE_WINDOW
     
     def get_last_seen_display(self):
         """Get human-readable last seen display"""
@@ -177,7 +205,11 @@ class Professional(models.Model):
 class PortfolioItem(models.Model):
     """Professional portfolio images"""
     professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='portfolio_items')
-    image = models.ImageField(upload_to='professionals/portfolio/')
+    image = models.ImageField(upload_to='professionals/portfolio/', storage=media_storage)
+    # Filled by the rendition pipeline (core.images) after upload
+    image_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    image_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True, null=True)
     service_category = models.ForeignKey('services.ServiceCategory', on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -191,12 +223,63 @@ class PortfolioItem(models.Model):
         return f"Portfólio de {self.professional.name}"
 
 
+class AvailabilityRule(models.Model):
+    """Weekly working hours of a professional (no rules = available during business hours)"""
+    WEEKDAY_CHOICES = [
+        (0, 'Segunda-feira'),
+        (1, 'Terça-feira'),
+        (2, 'Quarta-feira'),
+        (3, 'Quinta-feira'),
+        (4, 'Sexta-feira'),
+        (5, 'Sábado'),
+        (6, 'Domingo'),
+    ]
+    
+    professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='availability_rules')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, verbose_name="Dia da semana")
+    start_time = models.TimeField(verbose_name="Início")
+    end_time = models.TimeField(verbose_name="Fim")
+    
+    class Meta:
+        ordering = ['professional', 'weekday', 'start_time']
+        verbose_name = "Horário de Disponibilidade"
+        verbose_name_plural = "Horários de Disponibilidade"
+        constraints = [
+            models.CheckConstraint(check=models.Q(end_time__gt=models.F('start_time')), name='availability_rule_end_after_start'),
+        ]
+    
+    def __str__(self):
+        return f"{self.professional.name} - {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class AvailabilityException(models.Model):
+    """Day-specific change to the weekly hours: time off, or extra hours"""
+    professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='availability_exceptions')
+    date = models.DateField(verbose_name="Data")
+    start_time = models.TimeField(blank=True, null=True, verbose_name="Início", help_text="Vazio = dia inteiro")
+    end_time = models.TimeField(blank=True, null=True, verbose_name="Fim", help_text="Vazio = dia inteiro")
+    is_available = models.BooleanField(default=False, verbose_name="Disponível", help_text="Desmarcado = indisponível (folga); marcado = horário extra")
+    reason = models.CharField(max_length=200, blank=True, default='', verbose_name="Motivo")
+    
+    class Meta:
+        ordering = ['professional', 'date', 'start_time']
+        verbose_name = "Exceção de Disponibilidade"
+        verbose_name_plural = "Exceções de Disponibilidade"
+        indexes = [
+            models.Index(fields=['professional', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.professional.name} - {self.date}"
+
+
 class ProfileView(models.Model):
     """Track profile views for professionals"""
     professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='profile_views')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: views are written in batches and keep the time they happened
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
@@ -210,6 +293,25 @@ class ProfileView(models.Model):
         return f"Visualização de {self.professional.name} em {self.created_at.strftime('%d/%m/%Y %H:%M')}"
 
 
+class ProfileViewDaily(models.Model):
+    """Daily profile view totals per professional (rolled up from ProfileView)"""
+    professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='daily_profile_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['professional', 'date']
+        verbose_name = "Visualizações Diárias"
+        verbose_name_plural = "Visualizações Diárias"
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.professional.name} - {self.date.strftime('%d/%m/%Y')}: {self.views}"
+
+
 class Report(models.Model):
     """Report/Complaint model for reporting professionals or clients"""
     REASON_CHOICES = [
@@ -0,0 +1,115 @@
+"""
+Presence tracking for professionals (Professional.last_seen).
+
+Every request of a logged-in professional calls touch(), which only writes
+the timestamp to the cache and, at most once per PRESENCE_TOUCH_INTERVAL,
+queues it in a BatchBuffer. The buffer writes the newest timestamp of each
+professional with one bulk UPDATE (and the copy in the search index).
+
+Lists read presence with a single cache get_many (see attach_presence), so
+cards show activity that hasn't been flushed to the database yet.
+
+The cache is the default, per-process one (it is written on every request,
+see core.cache), so each gunicorn worker only sees the touches it served
+itself (online_status() only reads that). Presence is eventually consistent
+across workers and containers through the database: attach_presence() starts
+from the flushed last_seen, at most PRESENCE_TOUCH_INTERVAL plus
+PRESENCE_FLUSH_INTERVAL behind.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+from core.buffers import BatchBuffer
+from .models import Professional
+
+
+ONLINE_WINDOW = timedelta(minutes=10)
+CACHE_TIMEOUT = 60 * 60  # after that the flushed DB value is used
+
+
+def _cache_key(professional_id):
+    return f'presence:professional:{professional_id}'
+
+
+def _newer_than_stored(latest, id_field):
+    """Case expression setting last_seen to the queued timestamp, never moving it backwards"""
+    whens = [
+        When(Q(**{id_field: professional_id}) & (Q(last_seen__isnull=True) | Q(last_seen__lt=seen_at)), then=Value(seen_at))
+        for professional_id, seen_at in latest.items()
+    ]
+    return Case(*whens, default=F('last_seen'), output_field=DateTimeField())
+
+
+def _write_presence(items):
+    from services.models import ProfessionalSearchIndex
+
+    # Coalesce: only the newest timestamp of each professional is written
+    latest = {}
+    for professional_id, seen_at in items:
+        if professional_id not in latest or seen_at > latest[professional_id]:
+            latest[professional_id] = seen_at
+
+    Professional.objects.filter(pk__in=latest).update(last_seen=_newer_than_stored(latest, 'pk'))
+    ProfessionalSearchIndex.objects.filter(professional_id__in=latest).update(
+        last_seen=_newer_than_stored(latest, 'professional_id')
+    )
+
+
+presence_buffer = BatchBuffer(
+    _write_presence,
+    max_size=getattr(settings, 'PRESENCE_BATCH_SIZE', 200),
+    max_age=getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 30),
+    name='presence',
+)
+
+
+def touch(professional_id):
+    """Record activity of a professional (cache write, DB write is batched)"""
+    now = timezone.now()
+    key = _cache_key(professional_id)
+    previous = cache.get(key)
+    cache.set(key, now, CACHE_TIMEOUT)
+
+    interval = getattr(settings, 'PRESENCE_TOUCH_INTERVAL', 60)
+    if previous is None or (now - previous).total_seconds() >= interval:
+        presence_buffer.add((professional_id, now))
+
+
+def last_seen_many(professional_ids):
+    """Map professional id -> last activity recorded in the cache (one round-trip)"""
+    professional_ids = list(professional_ids)
+    cached = cache.get_many([_cache_key(professional_id) for professional_id in professional_ids])
+    return {
+        professional_id: cached[_cache_key(professional_id)]
+        for professional_id in professional_ids
+        if _cache_key(professional_id) in cached
+    }
+
+
+def online_status(professional_ids):
+    """Map professional id -> True if active within ONLINE_WINDOW"""
+    professional_ids = list(professional_ids)
+    threshold = timezone.now() - ONLINE_WINDOW
+    seen = last_seen_many(professional_ids)
+    return {
+        professional_id: professional_id in seen and seen[professional_id] >= threshold
+        for professional_id in professional_ids
+    }
+
+
+def attach_presence(professionals):
+    """
+    Refresh last_seen on already loaded professionals from the cache, so
+    is_online() and get_last_seen_display() reflect unflushed activity.
+    """
+    professionals = list(professionals)
+    seen = last_seen_many(professional.id for professional in professionals)
+    for professional in professionals:
+        cached = seen.get(professional.id)
+        if cached and (not professional.last_seen or cached > professional.last_seen):
+            professional.last_seen = cached
+    return professionals
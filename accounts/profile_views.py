@@ -0,0 +1,118 @@
+"""
+Profile view ingestion, daily rollups and retention.
+
+professional_profile only queues the view in memory; the events are written
+with bulk_create in batches (see core.buffers.BatchBuffer). The
+rollup_profile_views command then folds complete days into ProfileViewDaily
+and prunes raw rows that are already rolled up and past the retention window.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.buffers import BatchBuffer
+from .models import Professional, ProfileView, ProfileViewDaily
+
+
+def _write_profile_views(items):
+    # Skip views of professionals deleted since the view was queued
+    existing = set(Professional.objects.filter(
+        id__in={item['professional_id'] for item in items}
+    ).values_list('id', flat=True))
+    ProfileView.objects.bulk_create(
+        [ProfileView(**item) for item in items if item['professional_id'] in existing],
+        batch_size=500,
+    )
+
+
+profile_view_buffer = BatchBuffer(
+    _write_profile_views,
+    max_size=getattr(settings, 'PROFILE_VIEW_BATCH_SIZE', 100),
+    max_age=getattr(settings, 'PROFILE_VIEW_FLUSH_INTERVAL', 10),
+    name='profile-views',
+)
+
+
+def record_profile_view(professional_id, ip_address, user_agent):
+    """Queue a profile view (written later in a batch)"""
+    profile_view_buffer.add({
+        'professional_id': professional_id,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'created_at': timezone.now(),
+    })
+
+
+def start_of_day(day):
+    """Aware datetime for local midnight of the given date"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def last_rolled_up_day():
+    """Most recent date present in ProfileViewDaily (None if nothing rolled up yet)"""
+    return ProfileViewDaily.objects.aggregate(last=Max('date'))['last']
+
+
+def rollup_profile_views():
+    """
+    Roll complete days of raw ProfileView rows into ProfileViewDaily.
+    
+    Incremental: starts at the last rolled-up day (re-rolled to pick up views that were
+    still buffered at midnight) and stops before today. Returns the number of daily rows written.
+    """
+    today = timezone.localdate()
+    start_day = last_rolled_up_day()
+    if start_day is None:
+        first_view = ProfileView.objects.aggregate(first=Min('created_at'))['first']
+        if first_view is None:
+            return 0
+        start_day = timezone.localtime(first_view).date()
+    
+    if start_day >= today:
+        return 0
+    
+    buckets = ProfileView.objects.filter(
+        created_at__gte=start_of_day(start_day),
+        created_at__lt=start_of_day(today),
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    ).values('professional_id', 'day').annotate(total=Count('id'))
+    
+    rows = [
+        ProfileViewDaily(professional_id=bucket['professional_id'], date=bucket['day'], views=bucket['total'])
+        for bucket in buckets
+    ]
+    
+    with transaction.atomic():
+        ProfileViewDaily.objects.filter(date__gte=start_day, date__lt=today).delete()
+        ProfileViewDaily.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def prune_profile_views(retention_days=None, batch_size=5000):
+    """
+    Delete raw ProfileView rows older than retention_days that are already rolled up.
+    Returns the number of rows deleted.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, 'PROFILE_VIEW_RETENTION_DAYS', 90)
+    
+    rolled_until = last_rolled_up_day()
+    if rolled_until is None:
+        return 0
+    
+    # The last rolled-up day is rolled up again from its raw rows on the next run, so it is never pruned
+    cutoff_day = min(timezone.localdate() - timedelta(days=retention_days), rolled_until)
+    old_views = ProfileView.objects.filter(created_at__lt=start_of_day(cutoff_day))
+    
+    # Delete in chunks to keep transactions (and locks) short
+    deleted = 0
+    while True:
+        ids = list(old_views.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ProfileView.objects.filter(id__in=ids).delete()[0]
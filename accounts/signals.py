@@ -0,0 +1,24 @@
+"""
+Signal handlers that generate the responsive renditions of uploaded pictures
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.images import schedule_renditions
+from .models import Professional, PortfolioItem
+
+
+@receiver(post_save, sender=Professional)
+def professional_picture_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields and 'profile_picture' not in update_fields:
+        return
+    schedule_renditions(instance)
+
+
+@receiver(post_save, sender=PortfolioItem)
+def portfolio_image_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_renditions(instance)
@@ -1,3 +1,98 @@
+from datetime import date, time
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from bookings.models import Booking
+from locations.models import Province, City
+from reviews.models import Review
+from services.models import ServiceCategory, ProfessionalSearchIndex, ProfessionalService
+from services.search_index import reindex_professional
+from .models import Client, Professional
+from .presence import online_status, presence_buffer
+from .views import CLIENT_DASHBOARD_QUERY_BUDGET, PROFESSIONAL_DASHBOARD_QUERY_BUDGET
+
+
+class DashboardQueryBudgetTests(TestCase):
+    """The dashboards must not issue more queries as the number of bookings grows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name='Luanda', code='LUA')
+        city = City.objects.create(name='Luanda', province=province)
+        category = ServiceCategory.objects.create(name='Canalização', slug='canalizacao')
+        cls.professional = Professional.objects.create(
+            name='Ana', phone_number='+244912345678', nif='123456789', is_activated=True,
+        )
+        cls.professional.service_provinces.set([province])
+        service = ProfessionalService.objects.create(
+            professional=cls.professional, category=category, description='Reparações',
+        )
+        cls.client_account = Client.objects.create(name='Bruno', phone_number='+244923456789')
+
+        for i, status in enumerate(['pending', 'confirmed', 'in_progress', 'completed', 'cancelled'] * 3):
+            booking = Booking.objects.create(
+                client=cls.client_account, professional=cls.professional, service=service,
+                province=province, city=city, service_description='Torneira a pingar',
+                scheduled_date=date(2026, 1, 1), scheduled_time=time(10, 0), status=status,
+            )
+            if status == 'completed' and i % 2:
+                Review.objects.create(booking=booking, rating=5)
+
+    def test_client_dashboard_query_budget(self):
+        session = self.client.session
+        session['client_id'] = self.client_account.id
+        session.save()
+
+        with self.assertNumQueries(CLIENT_DASHBOARD_QUERY_BUDGET):
+            response = self.client.get(reverse('accounts:client_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['active_count'], 9)
+        self.assertEqual(response.context['completed_count'], 3)
+        self.assertEqual(response.context['total_count'], 15)
+
+    def test_professional_dashboard_query_budget(self):
+        session = self.client.session
+        session['professional_id'] = self.professional.id
+        session.save()
+
+        with self.assertNumQueries(PROFESSIONAL_DASHBOARD_QUERY_BUDGET):
+            response = self.client.get(reverse('accounts:professional_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['pending_count'], 3)
+        self.assertEqual(response.context['completed_count'], 3)
+        self.assertEqual(len(response.context['cancelled_bookings']), 3)
+
+        # Presence is only cached during the request, last_seen is written by the buffer
+        self.assertEqual(online_status([self.professional.id]), {self.professional.id: True})
+        self.assertEqual(presence_buffer.flush(), 1)
+        self.professional.refresh_from_db()
+        self.assertIsNotNone(self.professional.last_seen)
+
+
+class DeactivateProfessionalsActionTests(TestCase):
+    """The admin action must drop deactivated professionals from the search index"""
+
+    def setUp(self):
+        province = Province.objects.create(name='Luanda', code='LUA')
+        category = ServiceCategory.objects.create(name='Canalização', slug='canalizacao')
+        self.professional = Professional.objects.create(
+            name='Ana', phone_number='+244912345678', nif='123456789', is_activated=True,
+        )
+        self.professional.service_provinces.set([province])
+        ProfessionalService.objects.create(professional=self.professional, category=category, description='Reparações')
+        reindex_professional(self.professional.id)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def test_deactivate_from_filtered_changelist(self):
+        self.assertTrue(ProfessionalSearchIndex.objects.filter(professional=self.professional).exists())
 
-# Create your tests here.
+        response = self.client.post(
+            reverse('admin:accounts_professional_changelist') + '?is_activated__exact=1',
+            {'action': 'deactivate_professionals', '_selected_action': [self.professional.id]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.professional.refresh_from_db()
+        self.assertFalse(self.professional.is_activated)
+        self.assertFalse(ProfessionalSearchIndex.objects.filter(professional=self.professional).exists())
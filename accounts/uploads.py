@@ -0,0 +1,165 @@
+"""
+Portfolio image uploads: validated while streaming, processed in parallel.
+
+PortfolioUploadHandler replaces Django's default upload handlers for the
+portfolio step. It checks the file signature on the first chunk and the size
+as chunks arrive, so an unsupported or oversized file stops being written as
+soon as it is detected instead of after the whole request was buffered.
+
+The accepted files are then decoded, EXIF-stripped (metadata such as GPS
+position is not copied), downscaled and turned into their responsive
+renditions (core.images) by a bounded thread pool. Only the storage is used
+in the workers; the rows are inserted afterwards with one bulk_create. Files
+that can't be decoded are reported back; a storage failure fails the upload.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, UnidentifiedImageError
+
+from core.images import IMAGE_FIELDS, decode_image, delete_renditions, write_renditions
+from .models import PortfolioItem
+
+
+# File signatures of the accepted formats
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',        # JPEG
+    b'\x89PNG\r\n\x1a\n',   # PNG
+    b'GIF87a', b'GIF89a',   # GIF
+)
+
+
+def _is_webp(header):
+    return header[:4] == b'RIFF' and header[8:12] == b'WEBP'
+
+
+class PortfolioUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler that drops invalid files while they stream in.
+    Rejected files are listed in self.rejected as (file name, reason); accepted
+    ones get a position attribute with their index in the submitted list.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = getattr(settings, 'PORTFOLIO_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+        self.max_files = getattr(settings, 'PORTFOLIO_UPLOAD_MAX_FILES', 10)
+        self.received = 0
+        self.accepted = 0
+        self.rejected = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.position = self.received
+        self.received += 1
+        self.size = 0
+        self.header = None
+        self.error = None
+        if self.accepted >= self.max_files:
+            self.error = f'limite de {self.max_files} imagens por envio'
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None
+        if self.header is None:
+            self.header = raw_data[:12]
+            if not (self.header.startswith(IMAGE_SIGNATURES) or _is_webp(self.header)):
+                self.error = 'formato não suportado (use JPG, PNG, GIF ou WebP)'
+                return None
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.error = f'imagem maior que {filesizeformat(self.max_size)}'
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.error or not self.size:
+            self.file.close()  # temporary file, deleted on close
+            if self.file_name:
+                self.rejected.append((self.file_name, self.error or 'ficheiro vazio'))
+            return None
+        self.accepted += 1
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.position = self.position
+        return uploaded_file
+
+
+class UnreadableImage(Exception):
+    """The uploaded file could not be decoded as an image"""
+
+
+def _process_image(uploaded_file):
+    """
+    Decode, strip metadata, downscale and store one image. Returns the PortfolioItem image fields.
+    Raises UnreadableImage for files that are not valid images; storage errors propagate.
+    """
+    field_name, widths = IMAGE_FIELDS['accounts.PortfolioItem']
+    field = PortfolioItem._meta.get_field(field_name)
+    max_side = getattr(settings, 'PORTFOLIO_IMAGE_MAX_SIDE', 2048)
+
+    try:
+        uploaded_file.seek(0)
+        image, _, _ = decode_image(uploaded_file, max_side=max_side)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        # Re-encoded without the EXIF block
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        raise UnreadableImage(str(e)) from e
+
+    base, _ = os.path.splitext(os.path.basename(uploaded_file.name))
+    name = field.storage.save(field.generate_filename(None, f'{base}.jpg'), ContentFile(buffer.getvalue()))
+    try:
+        renditions = write_renditions(image, name, field.storage, widths)
+    except Exception:
+        field.storage.delete(name)
+        raise
+
+    return {
+        field_name: name,
+        f'{field_name}_width': image.width,
+        f'{field_name}_height': image.height,
+        f'{field_name}_renditions': renditions,
+    }
+
+
+def process_portfolio_uploads(files):
+    """
+    Process uploaded files concurrently (bounded pool).
+    Returns (results, rejected): results[i] is the image fields of files[i] or None if it
+    could not be decoded; rejected lists (file name, reason). If storing any image fails,
+    the images already stored are deleted and the error is raised.
+    """
+    workers = getattr(settings, 'PORTFOLIO_UPLOAD_WORKERS', 4)
+    results, rejected, error = [], [], None
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as executor:
+        futures = [executor.submit(_process_image, uploaded_file) for uploaded_file in files]
+        for uploaded_file, future in zip(files, futures):
+            try:
+                results.append(future.result())
+            except UnreadableImage:
+                results.append(None)
+                rejected.append((uploaded_file.name, 'não foi possível ler a imagem'))
+            except Exception as e:
+                results.append(None)
+                error = error or e
+    if error is not None:
+        delete_processed(results)
+        raise error
+    return results, rejected
+
+
+def delete_processed(results):
+    """Remove the stored files of processed images (when their rows could not be saved)"""
+    field_name, _ = IMAGE_FIELDS['accounts.PortfolioItem']
+    storage = PortfolioItem._meta.get_field(field_name).storage
+    for fields in results:
+        if fields:
+            storage.delete(fields[field_name])
+            delete_renditions(storage, fields[f'{field_name}_renditions'])
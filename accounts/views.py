@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Avg, Count
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.db import transaction
+from django.db.models import Avg, Count, Q
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User
 from .models import Professional, PortfolioItem, Client, Report
@@ -13,6 +15,7 @@ from .forms import (
     ReportForm
 )
 from services.models import ProfessionalService
+from .uploads import PortfolioUploadHandler, delete_processed, process_portfolio_uploads
 
 
 def google_oauth_callback(request):
@@ -159,29 +162,57 @@ def client_login(request):
     return render(request, 'accounts/client_login.html')
 
 
+# Query budgets for the dashboards (enforced in accounts/tests.py).
+# Client: session, client, status counts, 3 booking lists.
+CLIENT_DASHBOARD_QUERY_BUDGET = 6
+# Professional: session, professional, status counts, up to 5 booking lists
+# (lists whose count is zero are not queried).
+PROFESSIONAL_DASHBOARD_QUERY_BUDGET = 8
+
+ACTIVE_BOOKING_STATUSES = ['pending', 'confirmed', 'in_progress']
+
+
+def _booking_status_counts(bookings, **buckets):
+    """Count bookings per status bucket in a single conditional-aggregation query"""
+    return bookings.aggregate(**{
+        name: Count('id', filter=Q(status__in=statuses))
+        for name, statuses in buckets.items()
+    })
+
+
 def client_dashboard(request):
     """Dashboard for logged-in clients - shows bookings"""
-    if 'client_id' not in request.session:
+    client = request.actor.client
+    if client is None:
         messages.warning(request, 'Por favor, faça login primeiro.')
         return redirect('accounts:client_login')
     
-    client_id = request.session.get('client_id')
-    client = get_object_or_404(Client, id=client_id)
-    
-    # Get bookings
+    # Get bookings (with everything the cards render)
     from bookings.models import Booking
     bookings = Booking.objects.filter(client=client).order_by('-created_at')
+    cards = bookings.select_related('service__category', 'professional', 'province', 'city', 'neighborhood')
+    
+    # Statistics
+    counts = _booking_status_counts(
+        bookings,
+        active=ACTIVE_BOOKING_STATUSES,
+        completed=['completed'],
+        cancelled=['cancelled'],
+    )
     
     # Separate by status
-    pending_bookings = bookings.filter(status__in=['pending', 'confirmed', 'in_progress'])
-    completed_bookings = bookings.filter(status='completed')
-    cancelled_bookings = bookings.filter(status='cancelled')
+    pending_bookings = cards.filter(status__in=ACTIVE_BOOKING_STATUSES)
+    completed_bookings = cards.filter(status='completed').select_related('review')
+    cancelled_bookings = cards.filter(status='cancelled')
     
     context = {
         'client': client,
         'pending_bookings': pending_bookings,
         'completed_bookings': completed_bookings,
         'cancelled_bookings': cancelled_bookings,
+        'active_count': counts['active'],
+        'completed_count': counts['completed'],
+        'total_count': counts['active'] + counts['completed'] + counts['cancelled'],
     }
     
     return render(request, 'accounts/client_dashboard.html', context)
@@ -209,10 +240,7 @@ def professional_login(request):
             # Store professional ID in session
             request.session['professional_id'] = professional.id
             request.session['professional_name'] = professional.name
-            # Update last seen
-            from django.utils import timezone
-            professional.last_seen = timezone.now()
-            professional.save(update_fields=['last_seen'])
+            # last_seen is recorded by ActorMiddleware
             messages.success(request, f'Bem-vindo, {professional.name}!')
             return redirect('accounts:professional_dashboard')
         except Professional.DoesNotExist:
@@ -224,48 +252,43 @@ def professional_login(request):
 
 def professional_dashboard(request):
     """Dashboard for logged-in professionals"""
-    if 'professional_id' not in request.session:
+    professional = request.actor.professional
+    if professional is None:
         messages.warning(request, 'Por favor, faça login primeiro.')
         return redirect('accounts:professional_login')
     
-    professional_id = request.session.get('professional_id')
-    professional = get_object_or_404(Professional, id=professional_id)
-    
-    # Update last seen (but only if it's been more than 5 minutes to avoid too many DB writes)
-    from django.utils import timezone
-    from datetime import timedelta
-    if not professional.last_seen or professional.last_seen < timezone.now() - timedelta(minutes=5):
-        professional.last_seen = timezone.now()
-        professional.save(update_fields=['last_seen'])
-    
     # Get bookings
     from bookings.models import Booking
     all_bookings = Booking.objects.filter(professional=professional).order_by('-created_at')
+    cards = all_bookings.select_related('client', 'service__category', 'province', 'city')
+    
+    # Statistics (one query for all statuses)
+    counts = _booking_status_counts(
+        all_bookings,
+        pending=['pending'],
+        confirmed=['confirmed'],
+        in_progress=['in_progress'],
+        completed=['completed'],
+        cancelled=['cancelled'],
+    )
     
-    # Separate by status
-    pending_bookings = all_bookings.filter(status='pending')
-    confirmed_bookings = all_bookings.filter(status='confirmed')
-    in_progress_bookings = all_bookings.filter(status='in_progress')
-    completed_bookings = all_bookings.filter(status='completed')
-    cancelled_bookings = all_bookings.filter(status='cancelled')
-    
-    # Statistics
-    pending_count = pending_bookings.count()
-    confirmed_count = confirmed_bookings.count()
-    in_progress_count = in_progress_bookings.count()
-    completed_count = completed_bookings.count()
+    # Separate by status (empty buckets are not queried)
+    def bucket(status, limit):
+        if not counts[status]:
+            return []
+        return list(cards.filter(status=status)[:limit])
     
     context = {
         'professional': professional,
-        'pending_bookings': pending_bookings[:10],
-        'confirmed_bookings': confirmed_bookings[:10],
-        'in_progress_bookings': in_progress_bookings[:10],
-        'completed_bookings': completed_bookings[:10],
-        'cancelled_bookings': cancelled_bookings[:5],
-        'pending_count': pending_count,
-        'confirmed_count': confirmed_count,
-        'in_progress_count': in_progress_count,
-        'completed_count': completed_count,
+        'pending_bookings': bucket('pending', 10),
+        'confirmed_bookings': bucket('confirmed', 10),
+        'in_progress_bookings': bucket('in_progress', 10),
+        'completed_bookings': bucket('completed', 10),
+        'cancelled_bookings': bucket('cancelled', 5),
+        'pending_count': counts['pending'],
+        'confirmed_count': counts['confirmed'],
+        'in_progress_count': counts['in_progress'],
+        'completed_count': counts['completed'],
     }
     
     return render(request, 'accounts/professional_dashboard.html', context)
@@ -273,68 +296,34 @@ def professional_dashboard(request):
 
 def professional_booking_action(request, booking_id, action):
     """Handle booking actions (accept, reject, start, complete, cancel)"""
-    if 'professional_id' not in request.session:
+    professional = request.actor.professional
+    if professional is None:
         messages.warning(request, 'Por favor, faça login primeiro.')
         return redirect('accounts:professional_login')
     
-    professional_id = request.session.get('professional_id')
-    professional = get_object_or_404(Professional, id=professional_id)
-    
     from bookings.models import Booking
-    from django.utils import timezone
-    from core.emails import send_booking_status_update_to_client
+    from bookings.transitions import transition_booking
     
     booking = get_object_or_404(Booking, id=booking_id, professional=professional)
-    old_status = booking.status
-    
-    if action == 'accept':
-        if booking.status == 'pending':
-            booking.status = 'confirmed'
-            booking.save(update_fields=['status'])
-            # Send email notification
-            send_booking_status_update_to_client(booking, old_status)
-            messages.success(request, f'Reserva #{booking.id} confirmada com sucesso!')
-        else:
-            messages.error(request, 'Esta reserva não pode ser confirmada no estado atual.')
-    
-    elif action == 'reject':
-        if booking.status in ['pending', 'confirmed']:
-            booking.status = 'cancelled'
-            booking.save(update_fields=['status'])
-            # Send email notification
-            send_booking_status_update_to_client(booking, old_status)
-            messages.success(request, f'Reserva #{booking.id} cancelada.')
-        else:
-            messages.error(request, 'Esta reserva não pode ser cancelada no estado atual.')
-    
-    elif action == 'start':
-        if booking.status == 'confirmed':
-            booking.status = 'in_progress'
-            booking.save(update_fields=['status'])
-            # Send email notification
-            send_booking_status_update_to_client(booking, old_status)
-            messages.success(request, f'Iniciou o trabalho na reserva #{booking.id}!')
-        else:
-            messages.error(request, 'Esta reserva não pode ser iniciada no estado atual.')
-    
-    elif action == 'complete':
-        if booking.status == 'in_progress':
-            booking.status = 'completed'
-            booking.completed_at = timezone.now()
-            booking.save(update_fields=['status', 'completed_at'])
-            
-            # Update professional stats
-            professional.completed_bookings += 1
-            professional.save(update_fields=['completed_bookings'])
-            
-            # Send email notification
-            send_booking_status_update_to_client(booking, old_status)
-            messages.success(request, f'Reserva #{booking.id} marcada como concluída!')
-        else:
-            messages.error(request, 'Esta reserva não pode ser concluída no estado atual.')
     
-    else:
+    # action -> (target status, success message, error message)
+    booking_actions = {
+        'accept': ('confirmed', f'Reserva #{booking.id} confirmada com sucesso!', 'Esta reserva não pode ser confirmada no estado atual.'),
+        'reject': ('cancelled', f'Reserva #{booking.id} cancelada.', 'Esta reserva não pode ser cancelada no estado atual.'),
+        'start': ('in_progress', f'Iniciou o trabalho na reserva #{booking.id}!', 'Esta reserva não pode ser iniciada no estado atual.'),
+        'complete': ('completed', f'Reserva #{booking.id} marcada como concluída!', 'Esta reserva não pode ser concluída no estado atual.'),
+    }
+    
+    if action not in booking_actions:
         messages.error(request, 'Ação inválida.')
+        return redirect('accounts:professional_dashboard')
+    
+    # Status check, counters and client email happen in one transaction under a row lock
+    target, success_message, error_message = booking_actions[action]
+    if transition_booking(booking, target):
+        messages.success(request, success_message)
+    else:
+        messages.error(request, error_message)
     
     return redirect('accounts:professional_dashboard')
 
@@ -356,13 +345,7 @@ def register_professional(request):
     google_id = request.session.get('google_id')
     
     # Verifica se usuário está logado como cliente e pode usar os mesmos dados
-    existing_client = None
-    client_id = request.session.get('client_id')
-    if client_id:
-        try:
-            existing_client = Client.objects.get(id=client_id)
-        except Client.DoesNotExist:
-            pass
+    existing_client = request.actor.client
     
     if request.method == 'POST':
         form = ProfessionalRegistrationStep1Form(request.POST)
@@ -533,15 +516,21 @@ def register_professional_step3(request):
 
 
 @require_http_methods(["GET", "POST"])
+@csrf_exempt
 def register_professional_portfolio(request):
     """Step 4: Portfolio (optional)"""
-    if 'professional_id' not in request.session:
+    # Must be installed before anything reads request.POST/FILES, hence csrf_protect below
+    request.upload_handlers = [PortfolioUploadHandler(request)]
+    return _register_professional_portfolio(request)
+
+
+@csrf_protect
+def _register_professional_portfolio(request):
+    professional = request.actor.professional
+    if professional is None:
         messages.warning(request, 'Por favor, complete as etapas anteriores.')
         return redirect('accounts:register_professional')
     
-    professional_id = request.session.get('professional_id')
-    professional = Professional.objects.get(id=professional_id)
-    
     if request.method == 'POST':
         # Check if user wants to skip or add more
         if 'skip' in request.POST:
@@ -550,28 +539,46 @@ def register_professional_portfolio(request):
             request.session.pop('professional_id', None)
             return redirect('accounts:register_professional_success', professional_id=professional.id)
         
-        # Handle portfolio items
-        if 'portfolio_images' in request.FILES:
-            files = request.FILES.getlist('portfolio_images')
+        # Files were already size/type checked while streaming (PortfolioUploadHandler)
+        rejected = list(request.upload_handlers[0].rejected)
+        files = request.FILES.getlist('portfolio_images')
+        if files:
             descriptions = request.POST.getlist('portfolio_descriptions')
+            results, failed = process_portfolio_uploads(files)
+            rejected.extend(failed)
             
-            for i, file in enumerate(files):
-                description = descriptions[i] if i < len(descriptions) else ''
-                PortfolioItem.objects.create(
+            # Descriptions follow the submitted order, including files rejected while streaming
+            items = [
+                PortfolioItem(
                     professional=professional,
-                    image=file,
-                    description=description
+                    description=descriptions[uploaded_file.position] if uploaded_file.position < len(descriptions) else '',
+                    **fields
                 )
+                for uploaded_file, fields in zip(files, results)
+                if fields
+            ]
+            try:
+                with transaction.atomic():
+                    PortfolioItem.objects.bulk_create(items)
+            except Exception:
+                delete_processed(results)
+                raise
+        
+        for name, reason in rejected:
+            messages.warning(request, f'A imagem "{name}" não foi adicionada: {reason}.')
         
         # Clear session and redirect to success
         request.session.pop('professional_data', None)
         request.session.pop('professional_id', None)
         return redirect('accounts:register_professional_success', professional_id=professional.id)
     
+    from django.conf import settings
     return render(request, 'accounts/register_professional_portfolio.html', {
         'professional': professional,
         'step': 4,
-        'total_steps': 4
+        'total_steps': 4,
+        'max_files': getattr(settings, 'PORTFOLIO_UPLOAD_MAX_FILES', 10),
+        'max_size': getattr(settings, 'PORTFOLIO_UPLOAD_MAX_SIZE', 10 * 1024 * 1024),
     })
 
 
@@ -604,14 +611,19 @@ def professional_profile(request, pk):
     )
     
     # Track profile view (only if not viewing own profile)
+    # Queued in memory and written in batches, the request never waits on the insert
     if request.session.get('professional_id') != professional.id:
-        from .models import ProfileView
-        ProfileView.objects.create(
-            professional=professional,
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]  # Limit length
+        from .profile_views import record_profile_view
+        record_profile_view(
+            professional.id,
+            get_client_ip(request),
+            request.META.get('HTTP_USER_AGENT', '')[:500]  # Limit length
         )
     
+    # Presence not flushed to the database yet
+    from .presence import attach_presence
+    attach_presence([professional])
+    
     # Get portfolio items
     portfolio_items = professional.portfolio_items.all()[:12]
     
@@ -668,19 +680,8 @@ def report_professional(request, pk):
         form = ReportForm(request.POST)
         if form.is_valid():
             # Get reporter (can be client or professional)
-            reporter_client = None
-            reporter_professional = None
-            
-            if 'client_id' in request.session:
-                try:
-                    reporter_client = Client.objects.get(id=request.session['client_id'])
-                except Client.DoesNotExist:
-                    pass
-            elif 'professional_id' in request.session:
-                try:
-                    reporter_professional = Professional.objects.get(id=request.session['professional_id'])
-                except Professional.DoesNotExist:
-                    pass
+            reporter_client = request.actor.client
+            reporter_professional = None if reporter_client else request.actor.professional
             
             # Check if already reported by this user
             if reporter_client:
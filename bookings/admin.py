@@ -1,7 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.urls import reverse
+from core.exports import make_export_actions
+from core.pagination import EstimatedCountPaginator
 from .models import Booking
+from .transitions import ADMIN_TRANSITIONS, apply_transition
 
 
 @admin.register(Booking)
@@ -26,6 +29,10 @@ class BookingAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['created_at', 'updated_at', 'completed_at']
     date_hierarchy = 'scheduled_date'
+    list_select_related = ['client', 'professional', 'service__category']
+    # Large table: estimated total instead of COUNT(*)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Partes Envolvidas', {
@@ -38,7 +45,7 @@ class BookingAdmin(admin.ModelAdmin):
             'fields': ('service_description', 'special_instructions')
         }),
         ('Agendamento', {
-            'fields': ('scheduled_date', 'scheduled_time')
+            'fields': ('scheduled_date', 'scheduled_time', 'duration_minutes')
         }),
         ('Status e Pagamento', {
             'fields': ('status', 'agreed_price')
@@ -49,7 +56,7 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_completed', 'mark_cancelled', 'mark_confirmed']
+    actions = ['mark_completed', 'mark_cancelled', 'mark_confirmed'] + make_export_actions('bookings')
     
     def client_link(self, obj):
         url = reverse('admin:accounts_client_change', args=[obj.client.id])
@@ -81,18 +88,24 @@ class BookingAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = 'Status'
     
+    def _apply_transition(self, request, queryset, target, done_message):
+        # Counted first: the changelist filters (e.g. status) may no longer match afterwards
+        selected = queryset.count()
+        # Through the state machine so stats and client emails stay in sync
+        changed = apply_transition(queryset, target, ADMIN_TRANSITIONS)
+        self.message_user(request, f'{len(changed)} {done_message}')
+        skipped = selected - len(changed)
+        if skipped:
+            self.message_user(request, f'{skipped} reservas ignoradas (o estado atual não permite a alteração).', level=messages.WARNING)
+    
     def mark_completed(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.update(status='completed', completed_at=timezone.now())
-        self.message_user(request, f'{updated} reservas marcadas como concluídas.')
+        self._apply_transition(request, queryset, 'completed', 'reservas marcadas como concluídas.')
     mark_completed.short_description = 'Marcar como concluído'
     
     def mark_cancelled(self, request, queryset):
-        updated = queryset.update(status='cancelled')
-        self.message_user(request, f'{updated} reservas canceladas.')
+        self._apply_transition(request, queryset, 'cancelled', 'reservas canceladas.')
     mark_cancelled.short_description = 'Cancelar reservas'
     
     def mark_confirmed(self, request, queryset):
-        updated = queryset.update(status='confirmed')
-        self.message_user(request, f'{updated} reservas confirmadas.')
+        self._apply_transition(request, queryset, 'confirmed', 'reservas confirmadas.')
     mark_confirmed.short_description = 'Confirmar reservas'
@@ -0,0 +1,180 @@
+"""
+Availability of professionals and the booking slot engine.
+
+A professional's free time on a day is computed as intervals of minutes since
+midnight:
+
+    weekly rules of that weekday (business hours if they have no rules at all)
+    + extra-hours exceptions of the day
+    - time-off exceptions of the day
+    - active bookings of the day (scheduled_time + duration_minutes)
+
+load_free_intervals() does this for any number of professionals with a fixed
+number of queries (rules, exceptions, bookings), so the booking wizard can
+filter hundreds of candidates in one pass. Bookings must end on the day they
+start.
+"""
+from collections import defaultdict
+from datetime import time
+
+from accounts.models import AvailabilityRule, AvailabilityException
+from .models import Booking
+
+
+# Statuses that hold their slot in the professional's calendar
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed', 'in_progress')
+
+DAY_END = 24 * 60
+SLOT_STEP = 30  # minutes between suggested start times
+
+# Accepted start times of bookings (booking form, step 3 filter and suggested slots)
+EARLIEST_START = 6 * 60
+LATEST_START = 22 * 60
+
+# Hours of professionals without weekly rules: until midnight, so a booking
+# starting at LATEST_START can still last past 22h00
+DEFAULT_WINDOW = (EARLIEST_START, DAY_END)
+
+
+class SlotUnavailable(Exception):
+    """The professional is not free for the requested time"""
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def bookable_hours():
+    """Earliest and latest accepted start times"""
+    return to_time(EARLIEST_START), to_time(LATEST_START)
+
+
+def is_bookable_start(start_time):
+    return EARLIEST_START <= to_minutes(start_time) <= LATEST_START
+
+
+def _subtract(intervals, start, end):
+    """Remove [start, end) from sorted, disjoint intervals"""
+    result = []
+    for interval_start, interval_end in intervals:
+        if interval_end <= start or interval_start >= end:
+            result.append((interval_start, interval_end))
+            continue
+        if interval_start < start:
+            result.append((interval_start, start))
+        if interval_end > end:
+            result.append((end, interval_end))
+    return result
+
+
+def _merge(intervals):
+    """Sorted union of intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _exception_span(start_time, end_time):
+    if start_time is None or end_time is None:
+        return (0, DAY_END)
+    return (to_minutes(start_time), to_minutes(end_time) if end_time > start_time else DAY_END)
+
+
+def load_free_intervals(professional_ids, day, exclude_booking_id=None):
+    """Map professional id -> free [start, end) minute intervals on day (three queries)"""
+    professional_ids = list(professional_ids)
+    if not professional_ids:
+        return {}
+
+    weekday = day.weekday()
+    has_rules = set()
+    windows = defaultdict(list)
+    for professional_id, rule_weekday, start_time, end_time in AvailabilityRule.objects.filter(
+        professional_id__in=professional_ids
+    ).values_list('professional_id', 'weekday', 'start_time', 'end_time'):
+        has_rules.add(professional_id)
+        if rule_weekday == weekday:
+            windows[professional_id].append((to_minutes(start_time), to_minutes(end_time)))
+
+    time_off = defaultdict(list)
+    for professional_id, start_time, end_time, is_available in AvailabilityException.objects.filter(
+        professional_id__in=professional_ids, date=day
+    ).values_list('professional_id', 'start_time', 'end_time', 'is_available'):
+        if is_available:
+            windows[professional_id].append(_exception_span(start_time, end_time))
+        else:
+            time_off[professional_id].append(_exception_span(start_time, end_time))
+
+    busy = defaultdict(list)
+    bookings = Booking.objects.filter(
+        professional_id__in=professional_ids, scheduled_date=day, status__in=ACTIVE_BOOKING_STATUSES
+    )
+    if exclude_booking_id:
+        bookings = bookings.exclude(pk=exclude_booking_id)
+    for professional_id, scheduled_time, duration in bookings.values_list('professional_id', 'scheduled_time', 'duration_minutes'):
+        start = to_minutes(scheduled_time)
+        busy[professional_id].append((start, min(start + duration, DAY_END)))
+
+    free = {}
+    for professional_id in professional_ids:
+        intervals = windows.get(professional_id, [])
+        if professional_id not in has_rules:
+            intervals = intervals + [DEFAULT_WINDOW]
+        intervals = _merge(intervals)
+        for start, end in time_off.get(professional_id, []) + busy.get(professional_id, []):
+            intervals = _subtract(intervals, start, end)
+        free[professional_id] = intervals
+    return free
+
+
+def fits(intervals, start, end):
+    """Whether [start, end) lies inside one of the free intervals"""
+    return any(free_start <= start and end <= free_end for free_start, free_end in intervals)
+
+
+def free_professional_ids(durations, day, start_time):
+    """
+    Ids of the professionals free at start_time for their duration.
+    durations maps professional id -> booking duration in minutes.
+    """
+    start = to_minutes(start_time)
+    free = load_free_intervals(durations.keys(), day)
+    return {
+        professional_id
+        for professional_id, duration in durations.items()
+        if start + duration <= DAY_END and fits(free[professional_id], start, start + duration)
+    }
+
+
+def day_slots(professional_id, day, duration, step=SLOT_STEP):
+    """Start times (every step minutes) at which the professional is free for duration on day"""
+    intervals = load_free_intervals([professional_id], day)[professional_id]
+    slots = []
+    for free_start, free_end in intervals:
+        start = max(-(-free_start // step) * step, EARLIEST_START)
+        while start + duration <= free_end and start <= LATEST_START:
+            slots.append(to_time(start))
+            start += step
+    return slots
+
+
+def check_slot(professional_id, day, start_time, duration, exclude_booking_id=None):
+    """
+    Raise SlotUnavailable unless the professional is free for the slot.
+    Run it after locking the professional row (see bookings.transitions.create_booking).
+    """
+    start = to_minutes(start_time)
+    end = start + duration
+    if end > DAY_END:
+        raise SlotUnavailable('A reserva tem de terminar no mesmo dia.')
+    intervals = load_free_intervals([professional_id], day, exclude_booking_id)[professional_id]
+    if not fits(intervals, start, end):
+        raise SlotUnavailable('O profissional não está disponível neste horário.')
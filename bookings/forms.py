@@ -3,6 +3,8 @@ from django.core.exceptions import ValidationError
 from datetime import date, datetime, time
 from phonenumber_field.formfields import PhoneNumberField
 
+from .availability import bookable_hours, is_bookable_start
+
 
 class BookingConfirmForm(forms.Form):
     """Form for confirming a booking"""
@@ -97,12 +99,12 @@ class BookingConfirmForm(forms.Form):
                 if scheduled_time < current_time:
                     raise ValidationError('A hora não pode ser no passado para reservas de hoje.')
             
-            # Business hours validation (optional - can be adjusted)
-            # Allow bookings between 6 AM and 10 PM
-            min_time = time(6, 0)
-            max_time = time(22, 0)
-            if scheduled_time < min_time or scheduled_time > max_time:
-                raise ValidationError('As reservas devem ser agendadas entre 6h00 e 22h00.')
+            # Business hours validation (see bookings.availability)
+            if not is_bookable_start(scheduled_time):
+                earliest, latest = bookable_hours()
+                raise ValidationError(
+                    f'As reservas devem ser agendadas entre {earliest.hour}h{earliest:%M} e {latest.hour}h{latest:%M}.'
+                )
         
         return scheduled_time
     
@@ -0,0 +1,23 @@
+"""
+Management command to delete old idempotency keys of the booking form
+Run daily (e.g. Railway cron): python manage.py prune_booking_submissions
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from bookings.submissions import prune_submissions
+
+
+class Command(BaseCommand):
+    help = 'Delete booking form idempotency keys older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=getattr(settings, 'BOOKING_SUBMISSION_RETENTION_DAYS', 7),
+            help='Keep keys for this many days',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_submissions(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(f'🧹 {deleted} booking submissions pruned'))
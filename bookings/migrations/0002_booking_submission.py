@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.UUIDField(editable=False, unique=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Submetido em')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submission', to='bookings.booking')),
+            ],
+            options={
+                'verbose_name': 'Submissão de Reserva',
+                'verbose_name_plural': 'Submissões de Reserva',
+                'indexes': [models.Index(fields=['created_at'], name='bookings_bo_created_e68d59_idx')],
+            },
+        ),
+    ]
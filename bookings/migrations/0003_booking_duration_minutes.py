@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_submission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='duration_minutes',
+            field=models.PositiveSmallIntegerField(default=60, verbose_name='Duração (minutos)'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['professional', 'scheduled_date'], name='bookings_bo_profess_479f52_idx'),
+        ),
+    ]
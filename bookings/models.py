@@ -28,6 +28,7 @@ class Booking(models.Model):
     service_description = models.TextField()
     scheduled_date = models.DateField()
     scheduled_time = models.TimeField()
+    duration_minutes = models.PositiveSmallIntegerField(default=60, verbose_name="Duração (minutos)")
     special_instructions = models.TextField(blank=True, null=True)
     
     # Status and pricing
@@ -46,6 +47,7 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=['status', 'scheduled_date']),
             models.Index(fields=['professional', 'status']),
+            models.Index(fields=['professional', 'scheduled_date']),
         ]
     
     def __str__(self):
@@ -54,3 +56,21 @@ class Booking(models.Model):
     def can_be_reviewed(self):
         """Check if booking can be reviewed (must be completed)"""
         return self.status == 'completed'
+
+
+class BookingSubmission(models.Model):
+    """Idempotency key of a booking confirmation form (one booking per key)"""
+    key = models.UUIDField(unique=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Submetido em")
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, null=True, blank=True, related_name='submission')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Submissão de Reserva"
+        verbose_name_plural = "Submissões de Reserva"
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return str(self.key)
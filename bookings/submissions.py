@@ -0,0 +1,64 @@
+"""
+Idempotency keys of the booking confirmation form.
+
+A key is issued when the confirmation form is rendered and posted back with
+it. The POST that wins claim_submission() creates the booking; any replay of
+the same key (double click, browser resubmit, retry on a slow connection) is
+redirected to the booking it already created.
+
+The claim is a conditional UPDATE (claimed_at IS NULL) run inside the
+transaction that creates the booking: a concurrent duplicate blocks on the
+row until the winner commits and then matches no row. If the winner rolls
+back, its claim is rolled back too and the key can be used again.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import BookingSubmission
+
+
+def parse_key(value):
+    """UUID of a posted key, None if missing or malformed"""
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def issue_submission_key():
+    """Store a new key for a confirmation form and return it"""
+    return BookingSubmission.objects.create(key=uuid.uuid4()).key
+
+
+def submitted_booking_id(key):
+    """Id of the booking already created with this key, None otherwise"""
+    if key is None:
+        return None
+    return BookingSubmission.objects.filter(key=key).values_list('booking_id', flat=True).first()
+
+
+def claim_submission(key):
+    """
+    Claim a key for the current request; must run inside the booking transaction.
+    Returns False if the key is unknown or was already used.
+    """
+    if key is None:
+        return False
+    return BookingSubmission.objects.filter(key=key, claimed_at__isnull=True).update(claimed_at=timezone.now()) == 1
+
+
+def complete_submission(key, booking):
+    """Link the claimed key to the booking it created"""
+    BookingSubmission.objects.filter(key=key).update(booking=booking)
+
+
+def prune_submissions(retention_days=None):
+    """Delete keys older than retention_days. Returns the number of rows deleted."""
+    if retention_days is None:
+        retention_days = getattr(settings, 'BOOKING_SUBMISSION_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = BookingSubmission.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
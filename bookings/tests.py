@@ -1,3 +1,150 @@
+import uuid
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Client, Professional
+from locations.models import Province
+from services.models import ServiceCategory, ProfessionalService
+from .models import Booking, BookingSubmission
+from .submissions import issue_submission_key, prune_submissions
+from .transitions import TRANSITIONS, apply_transition, transition_booking
+
+
+class BookingConfirmIdempotencyTests(TestCase):
+    """A confirmation key creates at most one booking, however often it is posted"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.province = Province.objects.create(name='Luanda', code='LUA')
+        cls.category = ServiceCategory.objects.create(name='Canalização', slug='canalizacao')
+        cls.professional = Professional.objects.create(
+            name='Ana', phone_number='+244912345678', nif='123456789', is_activated=True,
+        )
+        ProfessionalService.objects.create(professional=cls.professional, category=cls.category, description='Reparações')
+
+    def setUp(self):
+        self.url = reverse('bookings:confirm', args=[self.professional.id])
+        self.start_booking()
+
+    def start_booking(self):
+        session = self.client.session
+        session['booking_category_id'] = self.category.id
+        session['booking_service_description'] = 'Torneira a pingar'
+        session['booking_province_id'] = self.province.id
+        session.save()
+
+    def post(self, key):
+        return self.client.post(self.url, {
+            'submission_key': str(key),
+            'client_name': 'Bruno',
+            'phone_number': '+244923456789',
+            'scheduled_date': (timezone.localdate() + timedelta(days=7)).isoformat(),
+            'scheduled_time': time(10, 0).strftime('%H:%M'),
+        })
+
+    def test_replayed_submission_redirects_to_the_same_booking(self):
+        key = issue_submission_key()
+        first = self.post(key)
+        booking = Booking.objects.get()
+        self.assertRedirects(first, reverse('bookings:success', args=[booking.id]), fetch_redirect_response=False)
+
+        # The session was cleared by the first POST, the replay still finds its booking
+        replay = self.post(key)
+        self.assertRedirects(replay, reverse('bookings:success', args=[booking.id]), fetch_redirect_response=False)
+        self.start_booking()
+        replay = self.post(key)
+        self.assertRedirects(replay, reverse('bookings:success', args=[booking.id]), fetch_redirect_response=False)
+
+        self.assertEqual(Booking.objects.count(), 1)
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.total_bookings, 1)
+
+    def test_unknown_key_is_rejected(self):
+        response = self.post(uuid.uuid4())
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.context['submission_key'])  # a fresh key to confirm again
+        self.assertFalse(Booking.objects.exists())
+
+    def test_expired_key_is_rejected(self):
+        key = issue_submission_key()
+        BookingSubmission.objects.filter(key=key).update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(prune_submissions(), 1)
+
+        response = self.post(key)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Booking.objects.exists())
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.total_bookings, 0)
+
+
+class BookingTransitionTests(TestCase):
+    """Status changes go through the state machine, once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.province = Province.objects.create(name='Luanda', code='LUA')
+        category = ServiceCategory.objects.create(name='Canalização', slug='canalizacao')
+        cls.professional = Professional.objects.create(
+            name='Ana', phone_number='+244912345678', nif='123456789', is_activated=True,
+        )
+        cls.service = ProfessionalService.objects.create(professional=cls.professional, category=category, description='Reparações')
+        cls.client_account = Client.objects.create(name='Bruno', phone_number='+244923456789')
+
+    def create_booking(self, status):
+        return Booking.objects.create(
+            client=self.client_account, professional=self.professional, service=self.service,
+            province=self.province, service_description='Torneira a pingar',
+            scheduled_date=date(2026, 1, 1), scheduled_time=time(10, 0), status=status,
+        )
+
+    def test_completing_twice_counts_once(self):
+        booking = self.create_booking('in_progress')
+        self.assertTrue(transition_booking(booking, 'completed'))
+        self.assertFalse(transition_booking(Booking.objects.get(pk=booking.pk), 'completed'))
+        self.assertEqual(apply_transition(Booking.objects.filter(pk=booking.pk), 'completed'), [])
+
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.completed_bookings, 1)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'completed')
+        self.assertIsNotNone(booking.completed_at)
+
+    def test_disallowed_transition_is_refused(self):
+        booking = self.create_booking('completed')
+        self.assertNotIn('completed', TRANSITIONS['confirmed'])
+        self.assertFalse(transition_booking(booking, 'confirmed'))
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'completed')
+
+        with self.assertRaises(ValueError):
+            apply_transition(Booking.objects.filter(pk=booking.pk), 'pending')
+
+    def test_admin_action_skips_disallowed_rows(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        pending = [self.create_booking('pending') for _ in range(2)]
+        completed = self.create_booking('completed')
+
+        # Filtered changelist: the confirmed bookings no longer match the filter after the action
+        response = self.client.post(
+            reverse('admin:bookings_booking_changelist') + '?status__exact=pending',
+            {'action': 'mark_confirmed', '_selected_action': [booking.pk for booking in pending]},
+            follow=True,
+        )
+        self.assertEqual([str(message) for message in response.context['messages']], ['2 reservas confirmadas.'])
 
-# Create your tests here.
+        response = self.client.post(
+            reverse('admin:bookings_booking_changelist'),
+            {'action': 'mark_confirmed', '_selected_action': [pending[0].pk, completed.pk]},
+            follow=True,
+        )
+        self.assertEqual(
+            [str(message) for message in response.context['messages']],
+            ['0 reservas confirmadas.', '2 reservas ignoradas (o estado atual não permite a alteração).'],
+        )
+        completed.refresh_from_db()
+        self.assertEqual(completed.status, 'completed')
+        self.assertEqual(Booking.objects.filter(status='confirmed').count(), 2)
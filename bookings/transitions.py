@@ -0,0 +1,116 @@
+"""
+Booking state machine.
+
+Every status change goes through apply_transition(), which locks the rows
+(SELECT ... FOR UPDATE), re-checks the current status under the lock, updates
+the professional's counters with F() expressions and queues the client
+notification, all in one transaction. Concurrent clicks therefore can't apply
+the same transition twice or lose counter updates.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import Professional
+from .availability import check_slot
+from .models import Booking
+
+
+# Target status -> statuses it can be reached from (professional actions)
+TRANSITIONS = {
+    'confirmed': {'pending'},
+    'in_progress': {'confirmed'},
+    'completed': {'in_progress'},
+    'cancelled': {'pending', 'confirmed'},
+}
+
+# Staff can also close bookings whose intermediate steps were skipped
+ADMIN_TRANSITIONS = {
+    'confirmed': {'pending'},
+    'completed': {'confirmed', 'in_progress'},
+    'cancelled': {'pending', 'confirmed', 'in_progress'},
+}
+
+
+def _add_to_counter(field, counts):
+    """Increment a Professional counter (professional id -> amount) without read-modify-write"""
+    from services.search_index import DENORMALIZED_FIELDS, sync_professional_stats
+
+    now = timezone.now()
+    for professional_id, amount in counts.items():
+        # updated_at moves too: it keys the cached professional cards
+        Professional.objects.filter(pk=professional_id).update(**{field: F(field) + amount, 'updated_at': now})
+    # update() skips post_save, refresh the search index copy explicitly
+    if field in DENORMALIZED_FIELDS:
+        sync_professional_stats(counts.keys())
+
+
+def apply_transition(queryset, target, transitions=TRANSITIONS):
+    """
+    Move the bookings of queryset that are allowed to reach target.
+    Returns the bookings that changed (others are left untouched).
+    """
+    from core.emails import send_booking_status_update_to_client
+
+    allowed_from = transitions.get(target)
+    if not allowed_from:
+        raise ValueError(f'Transição inválida para o estado: {target}')
+
+    with transaction.atomic():
+        # Lock in primary key order so concurrent batches can't deadlock
+        bookings = list(
+            Booking.objects.select_for_update(of=('self',))
+            .select_related('client')
+            .filter(pk__in=queryset.values('pk'), status__in=allowed_from)
+            .order_by('pk')
+        )
+        if not bookings:
+            return []
+
+        now = timezone.now()
+        changes = {'status': target, 'updated_at': now}
+        if target == 'completed':
+            changes['completed_at'] = now
+        Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).update(**changes)
+
+        if target == 'completed':
+            _add_to_counter('completed_bookings', Counter(booking.professional_id for booking in bookings))
+
+        for booking in bookings:
+            old_status = booking.status
+            for field, value in changes.items():
+                setattr(booking, field, value)
+            send_booking_status_update_to_client(booking, old_status)
+
+    return bookings
+
+
+def transition_booking(booking, target, transitions=TRANSITIONS):
+    """Apply a transition to a single booking. Returns True if it changed."""
+    changed = apply_transition(Booking.objects.filter(pk=booking.pk), target, transitions)
+    if not changed:
+        return False
+    for field in ('status', 'updated_at', 'completed_at'):
+        setattr(booking, field, getattr(changed[0], field))
+    return True
+
+
+def create_booking(**fields):
+    """
+    Create a pending booking and count it in the professional's total_bookings.
+    Raises SlotUnavailable if it overlaps another active booking or falls outside
+    the professional's availability.
+    """
+    booking = Booking(**fields)
+    if 'duration_minutes' not in fields:
+        booking.duration_minutes = booking.service.duration_minutes
+
+    with transaction.atomic():
+        # Serializes bookings of the same professional, so the overlap check holds until commit
+        list(Professional.objects.select_for_update().filter(pk=booking.professional_id).values_list('pk'))
+        check_slot(booking.professional_id, booking.scheduled_date, booking.scheduled_time, booking.duration_minutes)
+        booking.save()
+        _add_to_counter('total_bookings', {booking.professional_id: 1})
+    return booking
@@ -1,11 +1,23 @@
+from datetime import date, time
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from .models import Booking
 from .forms import BookingConfirmForm
+from .availability import SlotUnavailable, bookable_hours, day_slots, free_professional_ids, is_bookable_start
+from .submissions import claim_submission, complete_submission, issue_submission_key, parse_key, submitted_booking_id
+from .transitions import create_booking
 from services.models import ServiceCategory
+from services.search_index import PROFESSIONAL_ORDERINGS, PROFESSIONALS_PER_PAGE, professional_card_rows, search_professionals
+from accounts.cards import build_cards
 from accounts.models import Professional, Client
+from accounts.presence import attach_presence
+from core.pagination import KeysetPaginator, cached_count, cursor_querystring
 from locations.models import Province, City, Neighborhood
+from locations.views import location_tree_url
 
 
 def booking_step1_service(request, category_id):
@@ -53,6 +65,7 @@ def booking_step2_location(request):
         if not province_id:
             messages.error(request, 'Por favor, selecione uma província.')
             return render(request, 'bookings/step2_location.html', {
+                'location_tree_url': location_tree_url(),
                 'provinces': provinces,
                 'cities': cities,
                 'neighborhoods': neighborhoods,
@@ -69,10 +82,40 @@ def booking_step2_location(request):
         return redirect('bookings:step3_professional')
     
     return render(request, 'bookings/step2_location.html', {
+        'location_tree_url': location_tree_url(),
         'provinces': provinces,
     })
 
 
+def _availability_filter(request):
+    """Date and time of the step 3 availability filter (kept in the session for the confirm form)"""
+    if 'data' in request.GET:
+        request.session.pop('booking_scheduled_date', None)
+        request.session.pop('booking_scheduled_time', None)
+        try:
+            day = date.fromisoformat(request.GET.get('data', ''))
+            start = time.fromisoformat(request.GET.get('hora', ''))
+        except ValueError:
+            return None, None
+        if day < timezone.localdate():
+            messages.error(request, 'A data não pode ser no passado.')
+            return None, None
+        if not is_bookable_start(start):
+            earliest, latest = bookable_hours()
+            messages.error(request, f'As reservas devem ser agendadas entre {earliest.hour}h{earliest:%M} e {latest.hour}h{latest:%M}.')
+            return None, None
+        request.session['booking_scheduled_date'] = day.isoformat()
+        request.session['booking_scheduled_time'] = start.strftime('%H:%M')
+    
+    try:
+        return (
+            date.fromisoformat(request.session['booking_scheduled_date']),
+            time.fromisoformat(request.session['booking_scheduled_time']),
+        )
+    except (KeyError, ValueError):
+        return None, None
+
+
 def booking_step3_professional(request):
     """Step 3: Professional selection"""
     # Check if previous steps were completed
@@ -93,44 +136,43 @@ def booking_step3_professional(request):
     category = get_object_or_404(ServiceCategory, id=category_id)
     province = get_object_or_404(Province, id=province_id)
     
-    # Debug info (can be removed in production)
-    total_professionals = Professional.objects.filter(is_activated=True, is_blocked=False).count()
-    professionals_in_province = Professional.objects.filter(
-        is_activated=True,
-        is_blocked=False,
-        service_provinces=province
-    ).count()
-    professionals_with_category = Professional.objects.filter(
-        is_activated=True,
-        is_blocked=False,
-        professional_services__category=category,
-        professional_services__is_active=True
-    ).distinct().count()
-    
-    # Get available professionals
-    professionals = Professional.objects.filter(
-        is_activated=True,
-        is_blocked=False,
-        service_provinces=province,
-        professional_services__category=category,
-        professional_services__is_active=True
-    ).distinct()
-    
-    # Additional filters
-    # Note: If a city is selected, we include professionals who:
+    # Get available professionals (single indexed query, see services.search_index).
+    # If a city is selected, the index includes professionals who:
     # 1. Work in that specific city, OR
     # 2. Work in the entire province (no specific cities set)
-    if city_id:
-        from django.db.models import Q
-        professionals = professionals.filter(
-            Q(service_cities__id=city_id) | Q(service_cities__isnull=True)
-        ).distinct()
+    # Best rated first, paginated with the same cursors as the category listing
+    entries = search_professionals(category, province_id=province.id, city_id=city_id)
+    
+    # Optional date/time: only professionals free for their service duration (fixed number of queries)
+    availability_date, availability_time = _availability_filter(request)
+    if availability_date and availability_time:
+        from services.models import ProfessionalService
+        durations = {}
+        for professional_id, duration in ProfessionalService.objects.filter(
+            professional_id__in=entries.values('professional_id'), category=category, is_active=True
+        ).order_by('pk').values_list('professional_id', 'duration_minutes'):
+            durations.setdefault(professional_id, duration)
+        entries = entries.filter(professional_id__in=free_professional_ids(durations, availability_date, availability_time))
     
-    # Order by rating (best first)
-    professionals = professionals.order_by('-average_rating', '-completed_bookings')
+    paginator = KeysetPaginator(
+        professional_card_rows(entries), PROFESSIONAL_ORDERINGS['rating'], per_page=PROFESSIONALS_PER_PAGE
+    )
+    page = paginator.page(request.GET.get('cursor'))
+    professionals = attach_presence(build_cards(page, 'professional__'))
+    total_count = cached_count(entries, 'booking_step3_professional')
     
-    # Add helpful message if no professionals found
-    if not professionals.exists():
+    # Diagnostic counts are only needed to explain an empty result
+    total_professionals = professionals_in_province = professionals_with_category = 0
+    if not total_count:
+        total_professionals = Professional.objects.filter(is_activated=True, is_blocked=False).count()
+        professionals_in_province = Professional.objects.filter(
+            is_activated=True,
+            is_blocked=False,
+            service_provinces=province
+        ).count()
+        professionals_with_category = search_professionals(category).count()
+        
+        # Add helpful message if no professionals found
         messages.info(request, 
             f'Nenhum profissional encontrado para "{category.name}" em {province.name}. '
             f'Tente escolher outra categoria ou província, ou volte mais tarde. '
@@ -141,6 +183,13 @@ def booking_step3_professional(request):
         'category': category,
         'province': province,
         'professionals': professionals,
+        'total_count': total_count,
+        'availability_date': availability_date,
+        'availability_time': availability_time,
+        'bookable_hours': bookable_hours(),
+        'page': page,
+        'next_url': cursor_querystring(request, page.next_cursor) if page.has_next else None,
+        'previous_url': cursor_querystring(request, page.previous_cursor) if page.has_previous else None,
         'total_professionals': total_professionals,
         'professionals_in_province': professionals_in_province,
         'professionals_with_category': professionals_with_category,
@@ -149,6 +198,12 @@ def booking_step3_professional(request):
 
 def booking_confirm(request, professional_id):
     """Confirm booking with professional"""
+    # A replayed submission goes to the booking it already created (the session is cleared by then)
+    submission_key = parse_key(request.POST.get('submission_key')) if request.method == 'POST' else None
+    booking_id = submitted_booking_id(submission_key)
+    if booking_id:
+        return redirect('bookings:success', booking_id=booking_id)
+    
     # Check if previous steps were completed
     if 'booking_category_id' not in request.session:
         messages.warning(request, 'Por favor, complete os passos anteriores.')
@@ -156,22 +211,11 @@ def booking_confirm(request, professional_id):
     
     professional = get_object_or_404(Professional, id=professional_id, is_activated=True)
     
+    available_slots = []
     if request.method == 'POST':
         form = BookingConfirmForm(request.POST)
         
         if form.is_valid():
-            # Get or create client
-            phone_number = form.cleaned_data['phone_number']
-            client_name = form.cleaned_data['client_name']
-            
-            client, created = Client.objects.get_or_create(
-                phone_number=phone_number,
-                defaults={'name': client_name, 'is_verified': True}
-            )
-            if not created:
-                client.name = client_name
-                client.save()
-            
             # Get booking data from session
             category_id = request.session.get('booking_category_id')
             service_description = request.session.get('booking_service_description')
@@ -196,43 +240,82 @@ def booking_confirm(request, professional_id):
                 messages.error(request, 'Serviço não encontrado.')
                 return redirect('home')
             
-            # Create booking
-            booking = Booking.objects.create(
-                client=client,
-                professional=professional,
-                service=professional_service,
-                province_id=province_id,
-                city_id=city_id if city_id else None,
-                neighborhood_id=neighborhood_id if neighborhood_id else None,
-                address_line=address_line,
-                service_description=service_description,
-                scheduled_date=form.cleaned_data['scheduled_date'],
-                scheduled_time=form.cleaned_data['scheduled_time'],
-                special_instructions=form.cleaned_data.get('special_instructions', ''),
-            )
-            
-            # Clear session
-            for key in list(request.session.keys()):
-                if key.startswith('booking_'):
-                    del request.session[key]
-            
-            # Update professional stats
-            professional.total_bookings += 1
-            professional.save(update_fields=['total_bookings'])
-            
-            # Send email notifications
             from core.emails import send_booking_confirmation_to_client, send_booking_notification_to_professional
-            send_booking_confirmation_to_client(booking)
-            send_booking_notification_to_professional(booking)
             
-            messages.success(request, 'Reserva confirmada com sucesso!')
-            return redirect('bookings:success', booking_id=booking.id)
+            try:
+                with transaction.atomic():
+                    # Concurrent duplicates wait here until the first one commits, then match nothing
+                    if not claim_submission(submission_key):
+                        booking = None
+                    else:
+                        # Get or create client
+                        phone_number = form.cleaned_data['phone_number']
+                        client_name = form.cleaned_data['client_name']
+                        
+                        client, created = Client.objects.get_or_create(
+                            phone_number=phone_number,
+                            defaults={'name': client_name, 'is_verified': True}
+                        )
+                        if not created:
+                            client.name = client_name
+                            client.save()
+                        
+                        # Create booking (also counted in the professional's total_bookings)
+                        booking = create_booking(
+                            client=client,
+                            professional=professional,
+                            service=professional_service,
+                            province_id=province_id,
+                            city_id=city_id if city_id else None,
+                            neighborhood_id=neighborhood_id if neighborhood_id else None,
+                            address_line=address_line,
+                            service_description=service_description,
+                            scheduled_date=form.cleaned_data['scheduled_date'],
+                            scheduled_time=form.cleaned_data['scheduled_time'],
+                            special_instructions=form.cleaned_data.get('special_instructions', ''),
+                        )
+                        complete_submission(submission_key, booking)
+                        
+                        # Queue email notifications (same transaction as the booking)
+                        send_booking_confirmation_to_client(booking)
+                        send_booking_notification_to_professional(booking)
+            except SlotUnavailable as exc:
+                # Rolled back, including the key claim: the client can pick another time
+                form.add_error('scheduled_time', str(exc))
+                available_slots = day_slots(professional.id, form.cleaned_data['scheduled_date'], professional_service.duration_minutes)
+            else:
+                if booking is None:
+                    booking_id = submitted_booking_id(submission_key)
+                    if booking_id:
+                        return redirect('bookings:success', booking_id=booking_id)
+                    # Unknown or expired key: show the form again with a fresh one
+                    messages.warning(request, 'O formulário expirou. Por favor, confirme a reserva novamente.')
+                    return render(request, 'bookings/confirm.html', {
+                        'professional': professional,
+                        'form': form,
+                        'submission_key': issue_submission_key(),
+                    })
+                
+                # Clear session
+                for key in list(request.session.keys()):
+                    if key.startswith('booking_'):
+                        del request.session[key]
+                
+                messages.success(request, 'Reserva confirmada com sucesso!')
+                return redirect('bookings:success', booking_id=booking.id)
     else:
-        form = BookingConfirmForm()
+        # Date and time picked in step 3 (availability filter), if any
+        form = BookingConfirmForm(initial={
+            'scheduled_date': request.session.get('booking_scheduled_date'),
+            'scheduled_time': request.session.get('booking_scheduled_time'),
+        })
     
     return render(request, 'bookings/confirm.html', {
         'professional': professional,
-        'form': form
+        'form': form,
+        # An invalid POST keeps its key so the corrected form is still the same submission
+        'submission_key': submission_key or issue_submission_key(),
+        'available_slots': available_slots,
     })
 
 
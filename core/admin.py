@@ -0,0 +1,67 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import EmailOutbox, Job, StoredBlob
+from .pagination import EstimatedCountPaginator
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['recipient', 'last_error']
+    readonly_fields = ['kind', 'object_id', 'payload', 'recipient', 'attempts', 'last_error', 'created_at', 'sent_at']
+    date_hierarchy = 'created_at'
+    actions = ['retry_now']
+    # Grows with every email sent: estimated total instead of COUNT(*)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False  # Emails são enfileirados pela aplicação
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=EmailOutbox.STATUS_SENT).update(
+            status=EmailOutbox.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f'{updated} emails reenfileirados.')
+    retry_now.short_description = 'Reenviar agora'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at', 'created_at']
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['name', 'kwargs', 'attempts', 'locked_until', 'last_error', 'created_at', 'finished_at']
+    date_hierarchy = 'created_at'
+    actions = ['retry_now']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False  # Tarefas são enfileiradas pela aplicação
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status__in=[Job.STATUS_DONE, Job.STATUS_RUNNING]).update(
+            status=Job.STATUS_PENDING,
+            attempts=0,
+            run_at=timezone.now(),
+            finished_at=None,
+        )
+        self.message_user(request, f'{updated} tarefas reenfileiradas.')
+    retry_now.short_description = 'Executar novamente agora'
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'ref_count', 'orphaned_since', 'counted_at', 'created_at']
+    list_filter = ['orphaned_since', 'counted_at']
+    search_fields = ['name']
+    readonly_fields = ['name', 'size', 'ref_count', 'orphaned_since', 'counted_at', 'created_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False  # Registados pelo comando sweep_media
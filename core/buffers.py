@@ -0,0 +1,93 @@
+"""
+In-process write buffers flushed in batches by a background thread.
+
+Used for high-volume, low-value writes (e.g. profile views) so the request
+path only appends to a list and never waits on the database.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BatchBuffer:
+    """
+    Thread-safe buffer that hands its items to flush_func in batches.
+
+    A daemon thread flushes when max_size items are queued or max_age seconds
+    have passed since the oldest one. Remaining items are flushed at interpreter
+    exit (graceful shutdown), and a failed batch is put back to be retried.
+    """
+
+    def __init__(self, flush_func, max_size=100, max_age=10.0, name='batch-buffer'):
+        self.flush_func = flush_func
+        self.max_size = max_size
+        self.max_age = max_age
+        self.name = name
+        self._items = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        """Queue an item. Never touches the database."""
+        self._ensure_thread()
+        with self._lock:
+            if not self._items:
+                self._oldest = time.monotonic()
+            self._items.append(item)
+            full = len(self._items) >= self.max_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all queued items now. Returns the number of items flushed."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, []
+                self._oldest = None
+            if not items:
+                return 0
+            try:
+                self.flush_func(items)
+            except Exception:
+                logger.exception('%s: erro ao gravar %d itens, serão reenviados', self.name, len(items))
+                with self._lock:
+                    # Keep the batch for the next attempt, but never grow without bound
+                    self._items = (items + self._items)[-self.max_size * 10:]
+                    self._oldest = self._oldest or time.monotonic()
+                return 0
+            return len(items)
+
+    def _ensure_thread(self):
+        # Threads don't survive fork (gunicorn --preload), so restart per process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(timeout=self.max_age)
+            self._wakeup.clear()
+            oldest = self._oldest
+            if len(self._items) >= self.max_size or (oldest is not None and time.monotonic() - oldest >= self.max_age):
+                self.flush()
+                # This thread owns its own DB connection; don't keep it open between batches
+                connection.close()
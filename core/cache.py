@@ -0,0 +1,357 @@
+"""
+Two-tier cache backend: a per-process LRU in front of the database cache.
+
+    CACHES = {'shared': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'django_cache',   # cache table (python manage.py createcachetable)
+        'OPTIONS': {'LOCAL_MAX_ENTRIES': 5000, 'LOCAL_TIMEOUT': 300},
+    }}
+
+Every write costs a few queries on the primary database and a NOTIFY, so the
+backend is only meant for small, rarely written keys that every process must
+agree on: the version keys of the service catalog, the location tree and the
+page cache tags. They are used through shared_cache. Presence, rendered cards,
+pages and counts are written on the hot path and stay in the default
+(per-process) cache.
+
+Reads are served from process memory when possible and fall back to the
+shared table (DatabaseCache), so every gunicorn worker of every container
+sees the same data without a cache service. Every write also publishes the
+changed keys with pg_notify(); each process runs a listener thread (LISTEN on
+its own connection) that drops those keys from its memory, so a version bump
+made by one worker reaches the
+others at once. Notifications are sent when the writing transaction commits.
+The listener uses the psycopg2 notification API (the driver in requirements.txt).
+
+LOCAL_TIMEOUT bounds how long a key lives in memory, so a lost notification
+(or a key that expired in the table) is only served for that long; the
+listener also empties the memory whenever it (re)connects. On databases
+other than PostgreSQL nothing is broadcast and LOCAL_TIMEOUT is the only
+bound, which is fine for single-process development.
+"""
+import logging
+import os
+import pickle
+import re
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache import caches
+from django.db import connections, router
+from django.utils.connection import ConnectionProxy
+
+logger = logging.getLogger(__name__)
+
+
+MAX_PAYLOAD = 7000  # bytes per NOTIFY (PostgreSQL's limit is 8000)
+ALL_KEYS = '*'
+
+SHARED_CACHE_ALIAS = 'shared'
+
+# Cache of the keys every process must agree on, like django.core.cache.cache for the default one
+shared_cache = ConnectionProxy(caches, SHARED_CACHE_ALIAS)
+
+# Shared by the per-thread backend instances of a process, by LOCATION
+_local_stores = {}
+_listeners = {}
+_registry_lock = threading.Lock()
+
+
+class _LocalStore:
+    """Thread-safe LRU of pickled values with expiry times"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, pickled value)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            pickled = entry[1]
+        return True, pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class _Listener(threading.Thread):
+    """LISTENs on the invalidation channel and drops the notified keys from the local store"""
+
+    def __init__(self, alias, channel, origin, store):
+        super().__init__(name=f'cache-listener-{channel}', daemon=True)
+        self.alias = alias
+        self.channel = channel
+        self.origin = origin
+        self.store = store
+
+    def run(self):
+        delay = 1
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.warning('Cache invalidation listener disconnected, retrying in %ss', delay, exc_info=True)
+            # Notifications may have been missed meanwhile
+            self.store.clear()
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def _listen(self):
+        wrapper = connections.create_connection(self.alias)
+        try:
+            wrapper.ensure_connection()
+            wrapper.set_autocommit(True)
+            raw = wrapper.connection
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.channel}')
+            self.store.clear()
+            while True:
+                if select.select([raw], [], [], 60) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    self.handle(raw.notifies.pop(0).payload)
+        finally:
+            wrapper.close()
+
+    def handle(self, payload):
+        origin, _, keys = payload.partition('\n')
+        if origin == self.origin:
+            return  # this process already updated its store
+        if keys == ALL_KEYS:
+            self.store.clear()
+        else:
+            self.store.discard(keys.split('\n'))
+
+
+class TwoTierCache(BaseCache):
+    """Per-process LRU (first tier) over DatabaseCache (second tier), see the module docstring"""
+
+    def __init__(self, table, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared = DatabaseCache(table, {**params, 'OPTIONS': {
+            key: value for key, value in options.items() if key in ('MAX_ENTRIES', 'CULL_FREQUENCY')
+        }})
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self.channel = options.get('CHANNEL', 'django_cache')
+        if not re.fullmatch(r'[a-z_][a-z0-9_]*', self.channel):
+            raise ValueError(f'Invalid cache notification channel: {self.channel!r}')
+
+        with _registry_lock:
+            if table not in _local_stores:
+                _local_stores[table] = _LocalStore(options.get('LOCAL_MAX_ENTRIES', 5000))
+        self.local = _local_stores[table]
+        self.table = table
+
+    # --- Broadcasting ---
+
+    @property
+    def _alias(self):
+        return router.db_for_write(self.shared.cache_model_class)
+
+    def _broadcasts(self):
+        return connections[self._alias].vendor == 'postgresql'
+
+    def _ensure_listener(self):
+        """Start this process' listener (again after a fork)"""
+        pid = os.getpid()
+        listener = _listeners.get(self.table)
+        if listener is not None and listener[0] == pid:
+            return listener[1]
+        with _registry_lock:
+            listener = _listeners.get(self.table)
+            if listener is None or listener[0] != pid:
+                thread = _Listener(self._alias, self.channel, f'{pid}-{uuid.uuid4().hex}', self.local)
+                thread.start()
+                _listeners[self.table] = listener = (pid, thread)
+        return listener[1]
+
+    def _publish(self, keys):
+        if not keys or not self._broadcasts():
+            return
+        origin = self._ensure_listener().origin
+        batch, size = [], 0
+        with connections[self._alias].cursor() as cursor:
+            for key in keys:
+                if batch and size + len(key.encode()) + 1 > MAX_PAYLOAD:
+                    cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, '\n'.join([origin, *batch])])
+                    batch, size = [], 0
+                batch.append(key)
+                size += len(key.encode()) + 1
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, '\n'.join([origin, *batch])])
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    # --- Cache API ---
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        if self._broadcasts():
+            self._ensure_listener()
+        found, value = self.local.get(local_key)
+        if found:
+            return value
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            return default
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        if self._broadcasts():
+            self._ensure_listener()
+        result, missing = {}, []
+        for key in keys:
+            found, value = self.local.get(self.make_and_validate_key(key, version=version))
+            if found:
+                result[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self.local.set(self.make_key(key, version=version), value, self.local_timeout)
+            result.update(fetched)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, timeout, version=version)
+        self._store_local(local_key, value, timeout)
+        self._publish([local_key])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self._store_local(local_key, value, timeout)
+        self._publish([local_key])
+        return True
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        local_keys = []
+        for key, value in data.items():
+            if key not in failed:
+                local_key = self.make_key(key, version=version)
+                self._store_local(local_key, value, timeout)
+                local_keys.append(local_key)
+        self._publish(local_keys)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = self.shared.touch(key, timeout, version=version)
+        self._forget([key], version)
+        return touched
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        self._forget([key], version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self._forget(keys, version)
+
+    def has_key(self, key, version=None):
+        found, _ = self.local.get(self.make_and_validate_key(key, version=version))
+        return found or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self._forget([key], version)
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        self._publish([ALL_KEYS])
+
+    def _store_local(self, local_key, value, timeout):
+        local_timeout = self._local_timeout(timeout)
+        if local_timeout > 0:
+            self.local.set(local_key, value, local_timeout)
+        else:
+            self.local.discard([local_key])
+
+    def _forget(self, keys, version):
+        local_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        self.local.discard(local_keys)
+        self._publish(local_keys)
+
+
+class VersionedLoader:
+    """
+    Value built by load() and kept in process memory until its version in
+    shared_cache changes (bump(), e.g. from model signals) or ttl_setting
+    seconds pass. The TTL only matters when the shared cache is per-process
+    (LocMemCache in development), where other processes never see the bump.
+    """
+
+    def __init__(self, version_key, load, ttl_setting, default_ttl=300):
+        self.version_key = version_key
+        self.load = load
+        self.ttl_setting = ttl_setting
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._loaded = (None, 0, None)  # (version, expires_at, value), replaced as a whole
+
+    def bump(self):
+        """Invalidate the value in every process sharing the cache"""
+        shared_cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def version(self):
+        version = shared_cache.get(self.version_key)
+        if version is None:
+            shared_cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = shared_cache.get(self.version_key)
+        return version
+
+    def get(self):
+        """Current value (loaded on first use and after a bump)"""
+        version = self.version()
+        loaded_version, expires_at, value = self._loaded
+        if loaded_version == version and expires_at > time.monotonic():
+            return value
+
+        with self._lock:
+            loaded_version, expires_at, value = self._loaded
+            if loaded_version == version and expires_at > time.monotonic():
+                return value
+            value = self.load()
+            ttl = getattr(settings, self.ttl_setting, self.default_ttl)
+            self._loaded = (version, time.monotonic() + ttl, value)
+            return value
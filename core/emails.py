@@ -1,178 +1,249 @@
-from django.core.mail import send_mail
+"""
+Transactional emails.
+
+The send_* functions keep their original signatures but only enqueue an
+EmailOutbox row (one INSERT, in the caller's transaction). The
+send_queued_emails worker renders the messages, delivers them over a single
+SMTP connection per batch and retries failures with exponential backoff.
+"""
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.utils import timezone
 from django.utils.html import strip_tags
 
 
+STATUS_MESSAGES = {
+    'confirmed': 'sua reserva foi confirmada',
+    'cancelled': 'sua reserva foi cancelada',
+    'in_progress': 'o profissional iniciou o trabalho',
+    'completed': 'o serviço foi concluído',
+}
+
+
+def _base_url():
+    return getattr(settings, 'BASE_URL', 'http://localhost:8000')
+
+
+def _enqueue(kind, obj, recipient, **payload):
+    from .models import EmailOutbox
+    EmailOutbox.objects.create(kind=kind, object_id=obj.pk, recipient=recipient, payload=payload)
+    return True
+
+
+# --- Senders (enqueue only) ---
+
 def send_booking_confirmation_to_client(booking):
     """Send booking confirmation email to client"""
     if not booking.client.email:
         return False
-    
+    return _enqueue('booking_confirmation_client', booking, booking.client.email)
+
+
+def send_booking_notification_to_professional(booking):
+    """Send new booking notification to professional"""
+    if not booking.professional.email:
+        return False
+    return _enqueue('booking_notification_professional', booking, booking.professional.email)
+
+
+def send_booking_status_update_to_client(booking, old_status):
+    """Send status update email to client when booking status changes"""
+    if not booking.client.email:
+        return False
+    if booking.status not in STATUS_MESSAGES:
+        return False
+    # The status is stored so a later change doesn't alter this message
+    return _enqueue('booking_status_update', booking, booking.client.email, status=booking.status, old_status=old_status)
+
+
+def send_professional_registration_notification(professional):
+    """Send notification to admin when a professional registers"""
+    admin_email = getattr(settings, 'ADMIN_EMAIL', settings.DEFAULT_FROM_EMAIL)
+    return _enqueue('professional_registration_admin', professional, admin_email)
+
+
+def send_professional_activation_email(professional):
+    """Send activation confirmation email to professional"""
+    if not professional.email:
+        return False
+    return _enqueue('professional_activation', professional, professional.email)
+
+
+# --- Builders (run by the worker): return (subject, template, context) ---
+
+def _get_booking(booking_id):
+    from bookings.models import Booking
+    return Booking.objects.select_related('client', 'professional', 'service__category').get(pk=booking_id)
+
+
+def _get_professional(professional_id):
+    from accounts.models import Professional
+    return Professional.objects.get(pk=professional_id)
+
+
+def _build_booking_confirmation_client(booking_id, payload):
+    booking = _get_booking(booking_id)
     subject = f'Reserva Confirmada - {booking.service.category.name}'
-    
-    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
     context = {
         'booking': booking,
         'client': booking.client,
         'professional': booking.professional,
-        'base_url': base_url,
+        'base_url': _base_url(),
     }
-    
-    html_message = render_to_string('emails/booking_confirmation_client.html', context)
-    plain_message = strip_tags(html_message)
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.client.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Erro ao enviar email para cliente: {e}")
-        return False
+    return subject, 'emails/booking_confirmation_client.html', context
 
 
-def send_booking_notification_to_professional(booking):
-    """Send new booking notification to professional"""
-    if not booking.professional.email:
-        return False
-    
+def _build_booking_notification_professional(booking_id, payload):
+    booking = _get_booking(booking_id)
     subject = f'Nova Reserva Recebida - {booking.service.category.name}'
-    
-    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
     context = {
         'booking': booking,
         'client': booking.client,
         'professional': booking.professional,
-        'base_url': base_url,
+        'base_url': _base_url(),
     }
-    
-    html_message = render_to_string('emails/booking_notification_professional.html', context)
-    plain_message = strip_tags(html_message)
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.professional.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Erro ao enviar email para profissional: {e}")
-        return False
+    return subject, 'emails/booking_notification_professional.html', context
 
 
-def send_booking_status_update_to_client(booking, old_status):
-    """Send status update email to client when booking status changes"""
-    if not booking.client.email:
-        return False
-    
-    status_messages = {
-        'confirmed': 'sua reserva foi confirmada',
-        'cancelled': 'sua reserva foi cancelada',
-        'in_progress': 'o profissional iniciou o trabalho',
-        'completed': 'o serviço foi concluído',
-    }
-    
-    message_key = booking.status
-    if message_key not in status_messages:
-        return False
-    
-    subject = f'Atualização na Reserva #{booking.id} - {status_messages[message_key].title()}'
-    
-    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
+def _build_booking_status_update(booking_id, payload):
+    booking = _get_booking(booking_id)
+    booking.status = payload['status']
+    status_message = STATUS_MESSAGES[booking.status]
+    subject = f'Atualização na Reserva #{booking.id} - {status_message.title()}'
     context = {
         'booking': booking,
         'client': booking.client,
         'professional': booking.professional,
-        'status_message': status_messages[message_key],
-        'old_status': old_status,
-        'base_url': base_url,
+        'status_message': status_message,
+        'old_status': payload.get('old_status'),
+        'base_url': _base_url(),
     }
-    
-    html_message = render_to_string('emails/booking_status_update.html', context)
-    plain_message = strip_tags(html_message)
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.client.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Erro ao enviar email de atualização: {e}")
-        return False
+    return subject, 'emails/booking_status_update.html', context
 
 
-def send_professional_registration_notification(professional):
-    """Send notification to admin when a professional registers"""
-    admin_email = getattr(settings, 'ADMIN_EMAIL', settings.DEFAULT_FROM_EMAIL)
-    
+def _build_professional_registration_admin(professional_id, payload):
+    professional = _get_professional(professional_id)
     subject = f'Novo Cadastro de Profissional - {professional.name}'
-    
-    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
     context = {
         'professional': professional,
-        'admin_url': f'{base_url}/admin/accounts/professional/{professional.id}/change/',
+        'admin_url': f'{_base_url()}/admin/accounts/professional/{professional.id}/change/',
     }
-    
-    html_message = render_to_string('emails/professional_registration_admin.html', context)
-    plain_message = strip_tags(html_message)
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[admin_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Erro ao enviar notificação de registro: {e}")
-        return False
+    return subject, 'emails/professional_registration_admin.html', context
 
 
-def send_professional_activation_email(professional):
-    """Send activation confirmation email to professional"""
-    if not professional.email:
-        return False
-    
+def _build_professional_activation(professional_id, payload):
+    professional = _get_professional(professional_id)
     subject = 'Sua Conta foi Ativada - Conheces Alguém?'
-    
-    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
     context = {
         'professional': professional,
-        'login_url': f'{base_url}/accounts/profissional/login/',
+        'login_url': f'{_base_url()}/accounts/profissional/login/',
     }
-    
-    html_message = render_to_string('emails/professional_activation.html', context)
-    plain_message = strip_tags(html_message)
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[professional.email],
-            html_message=html_message,
-            fail_silently=False,
+    return subject, 'emails/professional_activation.html', context
+
+
+EMAIL_BUILDERS = {
+    'booking_confirmation_client': _build_booking_confirmation_client,
+    'booking_notification_professional': _build_booking_notification_professional,
+    'booking_status_update': _build_booking_status_update,
+    'professional_registration_admin': _build_professional_registration_admin,
+    'professional_activation': _build_professional_activation,
+}
+
+
+def build_message(item):
+    """Render an outbox item into an EmailMultiAlternatives"""
+    subject, template, context = EMAIL_BUILDERS[item.kind](item.object_id, item.payload)
+    html_message = render_to_string(template, context)
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=strip_tags(html_message),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[item.recipient],
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+# --- Delivery ---
+
+def retry_delay(attempts):
+    """Exponential backoff: EMAIL_OUTBOX_RETRY_DELAY * 2^(attempts - 1), capped at one hour"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def _claim_batch(batch_size):
+    """Lock a batch of due items (SKIP LOCKED lets several workers run side by side)"""
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        items = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        # Lease the batch so other workers skip it while it is being sent
+        EmailOutbox.objects.filter(id__in=[item.id for item in items]).update(
+            next_attempt_at=now + timedelta(minutes=5)
         )
-        return True
+    return items
+
+
+def deliver_pending_emails(batch_size=50):
+    """
+    Send one batch of due outbox items over a single SMTP connection.
+    Returns (sent, failed).
+    """
+    from .models import EmailOutbox
+
+    items = _claim_batch(batch_size)
+    if not items:
+        return 0, 0
+
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent, failed = [], []
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for item in items:
+            try:
+                message = build_message(item)
+                message.connection = connection
+                # One message per call, so a rejected recipient doesn't hide which ones went out
+                connection.send_messages([message])
+                sent.append(item)
+            except Exception as e:
+                item.last_error = f'{type(e).__name__}: {e}'
+                failed.append(item)
     except Exception as e:
-        print(f"Erro ao enviar email de ativação: {e}")
-        return False
+        # Could not connect at all: every unsent item of the batch is retried
+        done = {item.id for item in sent} | {item.id for item in failed}
+        for item in items:
+            if item.id not in done:
+                item.last_error = f'{type(e).__name__}: {e}'
+                failed.append(item)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    now = timezone.now()
+    if sent:
+        EmailOutbox.objects.filter(id__in=[item.id for item in sent]).update(
+            status=EmailOutbox.STATUS_SENT, sent_at=now, last_error=''
+        )
+    for item in failed:
+        item.attempts += 1
+        if item.attempts >= max_attempts:
+            item.status = EmailOutbox.STATUS_FAILED
+        item.next_attempt_at = now + retry_delay(item.attempts)
+    EmailOutbox.objects.bulk_update(failed, ['attempts', 'status', 'next_attempt_at', 'last_error'])
 
+    return len(sent), len(failed)
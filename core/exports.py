@@ -0,0 +1,150 @@
+"""
+Streaming exports (CSV / JSON Lines, optionally gzipped) of operational data.
+
+Rows are read with values_list(...).iterator(chunk_size=...) and encoded
+line by line, so memory stays flat regardless of how many rows are exported.
+Used by the admin export actions and the export_data command.
+"""
+import csv
+import json
+import zlib
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+# Dataset name -> (model label, exported fields)
+EXPORTS = {
+    'bookings': ('bookings.Booking', [
+        'id', 'status', 'created_at', 'scheduled_date', 'scheduled_time', 'completed_at',
+        'client_id', 'client__name', 'client__phone_number',
+        'professional_id', 'professional__name', 'service__category__name',
+        'province__name', 'city__name', 'neighborhood__name', 'address_line',
+        'agreed_price', 'service_description',
+    ]),
+    'reviews': ('reviews.Review', [
+        'id', 'booking_id', 'booking__professional_id', 'booking__professional__name',
+        'booking__client_id', 'booking__client__name', 'rating', 'comment', 'is_approved', 'created_at',
+    ]),
+    'reports': ('accounts.Report', [
+        'id', 'status', 'reason', 'created_at', 'resolved_at',
+        'reporter_client_id', 'reporter_professional_id', 'reported_professional_id', 'reported_client_id',
+        'description', 'admin_notes',
+    ]),
+    'profile_views': ('accounts.ProfileView', [
+        'id', 'professional_id', 'ip_address', 'user_agent', 'created_at',
+    ]),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+GZIP_FLUSH_BYTES = 64 * 1024
+
+
+class _ExportJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that falls back to str() (e.g. phone numbers)"""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+class _LineBuffer:
+    """File-like object for csv.writer that just returns the written line"""
+
+    def write(self, value):
+        return value
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    return str(value)
+
+
+def export_queryset(name, queryset=None):
+    """Queryset of a dataset (all rows unless a queryset of the same model is given)"""
+    label, _ = EXPORTS[name]
+    if queryset is None:
+        queryset = apps.get_model(label)._default_manager.all()
+    return queryset.order_by('pk')
+
+
+def iter_lines(name, queryset, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Yield the encoded lines of an export (header first for CSV)"""
+    _, fields = EXPORTS[name]
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([_to_text(value) for value in row])
+    elif fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), cls=_ExportJSONEncoder, ensure_ascii=False) + '\n'
+    else:
+        raise ValueError(f'Formato desconhecido: {fmt}')
+
+
+def iter_bytes(lines, compress=False):
+    """Encode lines to UTF-8, gzipping them in ~64KB blocks if compress is set"""
+    if not compress:
+        for line in lines:
+            yield line.encode('utf-8')
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= GZIP_FLUSH_BYTES:
+            chunk = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+
+def export_filename(name, fmt, compress=False):
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    return f"{name}-{stamp}.{fmt}{'.gz' if compress else ''}"
+
+
+def streaming_export_response(name, queryset=None, fmt='csv', compress=False):
+    """StreamingHttpResponse with the export as an attachment"""
+    lines = iter_lines(name, export_queryset(name, queryset), fmt)
+    response = StreamingHttpResponse(
+        iter_bytes(lines, compress),
+        content_type='application/gzip' if compress else f'{FORMATS[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(name, fmt, compress)}"'
+    return response
+
+
+def make_export_actions(name):
+    """Admin actions exporting the selected rows (CSV, CSV gzip, JSONL gzip)"""
+
+    def export_csv(modeladmin, request, queryset):
+        return streaming_export_response(name, queryset, 'csv')
+    export_csv.short_description = 'Exportar selecionados (CSV)'
+
+    def export_csv_gzip(modeladmin, request, queryset):
+        return streaming_export_response(name, queryset, 'csv', compress=True)
+    export_csv_gzip.short_description = 'Exportar selecionados (CSV, gzip)'
+
+    def export_jsonl_gzip(modeladmin, request, queryset):
+        return streaming_export_response(name, queryset, 'jsonl', compress=True)
+    export_jsonl_gzip.short_description = 'Exportar selecionados (JSONL, gzip)'
+
+    return [export_csv, export_csv_gzip, export_jsonl_gzip]
@@ -0,0 +1,152 @@
+"""
+Responsive image renditions (WebP + JPEG at fixed widths) of uploaded pictures.
+
+When an upload is saved, a background job (core.jobs) decodes the original
+once, stores its width/height on the row and writes one WebP and one JPEG per
+width next to it ("<name>_w320.webp", ...). The rendition paths are kept in the
+<field>_renditions JSON column together with the source file they were made
+from, so a replaced picture is detected and re-processed:
+
+    {"source": "professionals/portfolio/a.jpg", "webp": {"320": "...", ...}, "jpeg": {...}}
+
+The responsive_image template tag (core.templatetags.images) turns that into
+srcset attributes. Rows uploaded before the pipeline are handled by:
+python manage.py generate_image_renditions
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps
+
+from .jobs import enqueue, job
+
+logger = logging.getLogger(__name__)
+
+
+# Model label -> (image field, rendition widths in px)
+IMAGE_FIELDS = {
+    'accounts.Professional': ('profile_picture', (96, 192, 384)),
+    'accounts.PortfolioItem': ('image', (320, 640, 1280)),
+}
+
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def renditions_up_to_date(instance, field_name):
+    """Whether the stored renditions were made from the current file"""
+    fieldfile = getattr(instance, field_name)
+    renditions = getattr(instance, f'{field_name}_renditions') or {}
+    return not fieldfile or renditions.get('source') == fieldfile.name
+
+
+def _rendition_name(name, width, fmt):
+    base, _ = os.path.splitext(name)
+    return f'{base}_w{width}.{fmt}'
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def decode_image(source, max_side=None):
+    """
+    Decode an image file to an RGB, EXIF-rotated PIL image.
+    Returns (image, width, height) where width/height are those of the (rotated) original.
+    """
+    image = Image.open(source)
+    original_width, original_height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        original_width, original_height = original_height, original_width
+    if max_side:
+        # JPEG can decode directly at a reduced scale
+        image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.load()
+    return _to_rgb(image), original_width, original_height
+
+
+def write_renditions(image, name, storage, widths):
+    """Save the renditions of a decoded image next to name. Returns the renditions dict."""
+    renditions = {'source': name}
+    for fmt in RENDITION_FORMATS:
+        renditions[fmt] = {}
+
+    # Never upscale; largest first, each one resized from the previous (cheaper than from the original)
+    for width in sorted({min(width, image.width) for width in widths}, reverse=True):
+        if width < image.width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        for fmt, (pil_format, options) in RENDITION_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, pil_format, **options)
+            rendition_name = _rendition_name(name, width, fmt)
+            if storage.exists(rendition_name):
+                storage.delete(rendition_name)
+            renditions[fmt][str(image.width)] = storage.save(rendition_name, ContentFile(buffer.getvalue()))
+
+    return renditions
+
+
+def generate_renditions(fieldfile, widths):
+    """
+    Write the renditions of an image file to its storage.
+    Returns (width, height, renditions) of the (EXIF-rotated) original.
+    """
+    with fieldfile.open('rb') as source:
+        image, width, height = decode_image(source, max_side=max(widths) * 4)
+    return width, height, write_renditions(image, fieldfile.name, fieldfile.storage, widths)
+
+
+def delete_renditions(storage, renditions):
+    for fmt in RENDITION_FORMATS:
+        for name in (renditions or {}).get(fmt, {}).values():
+            try:
+                storage.delete(name)
+            except OSError:
+                logger.warning('Could not delete rendition %s', name)
+
+
+@job(max_attempts=3)
+def process_image(label, pk):
+    """Generate the renditions of one row (no-op if they are already up to date)"""
+    field_name, widths = IMAGE_FIELDS[label]
+    model = apps.get_model(label)
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or renditions_up_to_date(instance, field_name):
+        return False
+
+    fieldfile = getattr(instance, field_name)
+    previous = getattr(instance, f'{field_name}_renditions') or {}
+    width, height, renditions = generate_renditions(fieldfile, widths)
+
+    # Only store them if the picture wasn't replaced meanwhile
+    updated = model._default_manager.filter(pk=pk, **{field_name: fieldfile.name}).update(**{
+        f'{field_name}_width': width,
+        f'{field_name}_height': height,
+        f'{field_name}_renditions': renditions,
+    })
+    if not updated:
+        delete_renditions(fieldfile.storage, renditions)
+        return False
+    if previous.get('source') != fieldfile.name:
+        delete_renditions(fieldfile.storage, previous)
+    return True
+
+
+def schedule_renditions(instance):
+    """Generate the renditions of a saved row in the background (the job commits with the row)"""
+    label = instance._meta.label
+    field_name, _ = IMAGE_FIELDS[label]
+    if renditions_up_to_date(instance, field_name):
+        return
+    enqueue(process_image, label=label, pk=instance.pk)
@@ -0,0 +1,207 @@
+"""
+Background jobs stored in the database (core.models.Job).
+
+A job is a call to a function decorated with @job, with JSON keyword
+arguments:
+
+    @job(max_attempts=3)
+    def recompute_something(professional_id):
+        ...
+
+    enqueue(recompute_something, professional_id=1)               # as soon as possible
+    enqueue(recompute_something, delay=timedelta(minutes=5), ...)  # scheduled
+
+enqueue() is one INSERT in the caller's transaction, so a job of a rolled
+back request never runs. The run_worker command claims due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED (several workers never get the same job),
+runs them on a thread pool and retries failures with exponential backoff;
+jobs that keep failing are left in the "dead" state for inspection and
+retry from the admin. A worker that dies mid-job loses its lease after
+JOB_LEASE_SECONDS and the job is claimed again, which counts as an attempt;
+only the run holding the latest attempt records its outcome.
+
+SQLite has no SKIP LOCKED (nor row locks): there the worker runs one job at
+a time, which is enough for local development.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def job(func=None, *, max_attempts=None):
+    """Mark a module-level function as runnable by the worker (@job or @job(max_attempts=3))"""
+    def decorator(func):
+        func.is_job = True
+        func.job_max_attempts = max_attempts
+        return func
+    return decorator(func) if func is not None else decorator
+
+
+def enqueue(func, *, delay=None, run_at=None, **kwargs):
+    """Queue a call of a @job function (kwargs must be JSON serializable). Returns the Job."""
+    from .models import Job
+
+    if not getattr(func, 'is_job', False):
+        raise ValueError(f'{func.__qualname__} não é uma tarefa (use o decorador @job)')
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta(0))
+    return Job.objects.create(
+        name=f'{func.__module__}.{func.__qualname__}',
+        kwargs=kwargs,
+        run_at=run_at,
+        max_attempts=func.job_max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_DELAY * 2^(attempts - 1), capped at one hour"""
+    base = getattr(settings, 'JOB_RETRY_DELAY', 30)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def supports_concurrent_workers():
+    return connection.features.has_select_for_update_skip_locked
+
+
+def claim_jobs(limit):
+    """
+    Lock and lease up to limit due jobs (pending ones, or running ones whose worker lost the lease).
+    Jobs that lost their lease on their last attempt (e.g. they kill the worker) are marked dead.
+    """
+    from .models import Job
+
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'JOB_LEASE_SECONDS', 600))
+    with transaction.atomic():
+        lost = Job.objects.filter(status=Job.STATUS_RUNNING, locked_until__lt=now)
+        for dead in lost.filter(attempts__gte=F('max_attempts')).select_for_update(skip_locked=True).only('id', 'name', 'attempts'):
+            logger.error('Job %s (%s) lost its lease on attempt %s, giving up', dead.id, dead.name, dead.attempts)
+            Job.objects.filter(pk=dead.pk).update(
+                status=Job.STATUS_DEAD, finished_at=now, locked_until=None,
+                last_error='O worker parou durante a execução (prazo da tarefa expirado)',
+            )
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Job.STATUS_PENDING, run_at__lte=now)
+                | Q(status=Job.STATUS_RUNNING, locked_until__lt=now, attempts__lt=F('max_attempts'))
+            )
+            .order_by('run_at', 'id')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(id__in=[claimed.id for claimed in jobs]).update(
+                status=Job.STATUS_RUNNING, locked_until=now + lease, attempts=F('attempts') + 1,
+            )
+    for claimed in jobs:
+        claimed.status = Job.STATUS_RUNNING
+        claimed.attempts += 1
+    return jobs
+
+
+def _resolve(name):
+    func = import_string(name)
+    if not getattr(func, 'is_job', False):
+        raise ValueError(f'{name} não é uma tarefa')
+    return func
+
+
+def run_job(claimed):
+    """
+    Run a claimed job and record the outcome. Returns the new status, or None if
+    the job was claimed again meanwhile (lease expired), in which case the outcome is dropped.
+    """
+    from .models import Job
+
+    try:
+        _resolve(claimed.name)(**claimed.kwargs)
+    except Exception as e:
+        now = timezone.now()
+        changes = {'last_error': f'{type(e).__name__}: {e}', 'locked_until': None}
+        if claimed.attempts >= claimed.max_attempts:
+            changes.update(status=Job.STATUS_DEAD, finished_at=now)
+            logger.exception('Job %s (%s) failed for good after %s attempts', claimed.id, claimed.name, claimed.attempts)
+        else:
+            changes.update(status=Job.STATUS_PENDING, run_at=now + retry_delay(claimed.attempts))
+            logger.warning('Job %s (%s) failed, attempt %s: %s', claimed.id, claimed.name, claimed.attempts, e)
+    else:
+        changes = {'status': Job.STATUS_DONE, 'finished_at': timezone.now(), 'last_error': '', 'locked_until': None}
+
+    # Only while this run still owns the job: a reclaim bumps attempts
+    owned = Job.objects.filter(pk=claimed.pk, status=Job.STATUS_RUNNING, attempts=claimed.attempts)
+    if not owned.update(**changes):
+        logger.warning('Job %s (%s) was claimed again before attempt %s finished, outcome dropped', claimed.id, claimed.name, claimed.attempts)
+        return None
+    return changes['status']
+
+
+def _run_in_thread(claimed):
+    try:
+        return run_job(claimed)
+    finally:
+        close_old_connections()
+
+
+def prune_jobs(days=None):
+    """Delete finished jobs older than days (dead ones are kept). Returns the number deleted."""
+    from .models import Job
+
+    if days is None:
+        days = getattr(settings, 'JOB_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(concurrency=None, loop=True, interval=2.0, on_result=None):
+    """
+    Claim and run jobs on a pool of concurrency threads (one job at a time, in
+    this thread, without SKIP LOCKED). Without loop, returns once no job is due.
+    on_result(job, status) is called for every finished job.
+    """
+    if concurrency is None:
+        concurrency = getattr(settings, 'JOB_WORKER_CONCURRENCY', 4)
+    if not supports_concurrent_workers():
+        concurrency = 1
+    concurrency = max(1, concurrency)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='jobs') if concurrency > 1 else None
+    running = {}
+    last_pruned = time.monotonic()
+    try:
+        while True:
+            claimed = claim_jobs(concurrency - len(running)) if len(running) < concurrency else []
+            for item in claimed:
+                if executor is None:
+                    status = run_job(item)
+                    if on_result is not None:
+                        on_result(item, status)
+                else:
+                    running[executor.submit(_run_in_thread, item)] = item
+
+            if running:
+                # Wake up when a thread is free, or after interval to pick up newly due jobs
+                done, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    if on_result is not None:
+                        on_result(item, future.result())
+            elif not claimed:
+                if not loop:
+                    return
+                if time.monotonic() - last_pruned > 3600:
+                    prune_jobs()
+                    last_pruned = time.monotonic()
+                close_old_connections()
+                time.sleep(interval)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,37 @@
+"""
+Management command that streams bookings, reviews, reports or profile views to a file
+Execute: python manage.py export_data bookings --format csv --gzip --output bookings.csv.gz
+"""
+import sys
+
+from django.core.management.base import BaseCommand
+from core.exports import CHUNK_SIZE, EXPORTS, FORMATS, export_queryset, iter_bytes, iter_lines
+
+
+class Command(BaseCommand):
+    help = 'Export a dataset as CSV or JSON Lines (optionally gzipped) without loading it into memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument('--output', help='Output file (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        name = options['dataset']
+        lines = iter_lines(name, export_queryset(name), options['format'], chunk_size=options['chunk_size'])
+        chunks = iter_bytes(lines, compress=options['gzip'])
+
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        self.stderr.write(f'✅ {name} exportado para {options["output"]} ({written} bytes)')
@@ -0,0 +1,42 @@
+"""
+Management command to generate missing responsive image renditions
+Run after deploying the pipeline (and from cron to catch jobs lost in restarts):
+python manage.py generate_image_renditions
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core.images import IMAGE_FIELDS, process_image, renditions_up_to_date
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG renditions of profile pictures and portfolio images that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=sorted(IMAGE_FIELDS),
+            help='Only process this model (default: all)',
+        )
+
+    def handle(self, *args, **options):
+        labels = [options['model']] if options['model'] else sorted(IMAGE_FIELDS)
+
+        for label in labels:
+            field_name, _ = IMAGE_FIELDS[label]
+            rows = (
+                apps.get_model(label)._default_manager
+                .exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                .only('pk', field_name, f'{field_name}_renditions')
+                .order_by('pk')
+            )
+            done = failed = 0
+            for instance in rows.iterator(chunk_size=200):
+                if renditions_up_to_date(instance, field_name):
+                    continue
+                try:
+                    if process_image(label, instance.pk):
+                        done += 1
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f'❌ {label} {instance.pk}: {exc}')
+            self.stdout.write(self.style.SUCCESS(f'🖼️  {label}: {done} renditions generated, {failed} failed'))
@@ -0,0 +1,33 @@
+"""
+Management command that runs background jobs (core.jobs)
+Execute: python manage.py run_worker
+"""
+from django.core.management.base import BaseCommand
+from core.jobs import supports_concurrent_workers, work
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs on a thread pool, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None, help='Jobs run at the same time (JOB_WORKER_CONCURRENCY by default)')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds between polls when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due and exit')
+
+    def handle(self, *args, **options):
+        if not supports_concurrent_workers():
+            self.stdout.write(self.style.WARNING('⚠️  Base de dados sem SKIP LOCKED (SQLite): uma tarefa de cada vez'))
+
+        def report(job, status):
+            if options['verbosity'] > 1 or status != 'done':
+                self.stdout.write(f'⚙️  #{job.id} {job.name}: {status or "retomada por outro worker"}')
+
+        try:
+            work(
+                concurrency=options['concurrency'],
+                loop=not options['once'],
+                interval=options['interval'],
+                on_result=report,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write('Worker de tarefas encerrado.')
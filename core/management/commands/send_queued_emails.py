@@ -0,0 +1,37 @@
+"""
+Management command that delivers queued emails (EmailOutbox)
+Execute: python manage.py send_queued_emails --loop
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.emails import deliver_pending_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails in batches over one SMTP connection, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new emails')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls when the queue is empty')
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                sent, failed = deliver_pending_emails(batch_size=options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(f'📧 {sent} enviados, {failed} com erro')
+                
+                if not options['loop']:
+                    # Single run: drain everything that is due, then exit
+                    if sent or failed:
+                        continue
+                    return
+                
+                if not (sent or failed):
+                    close_old_connections()
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker de emails encerrado.')
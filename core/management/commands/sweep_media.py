@@ -0,0 +1,36 @@
+"""
+Management command to recount media blob references and delete orphans
+Run daily (e.g. Railway cron): python manage.py sweep_media
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from core.storage import sweep_media
+
+
+class Command(BaseCommand):
+    help = 'Recount references of content-addressed media files and delete the unreferenced ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=getattr(settings, 'MEDIA_ORPHAN_GRACE_HOURS', 24),
+            help='Only delete files unreferenced for at least this many hours',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report, do not change anything',
+        )
+
+    def handle(self, *args, **options):
+        stats = sweep_media(options['grace_hours'], dry_run=options['dry_run'])
+        self.stdout.write(
+            f"📦 {stats['blobs']} files, {stats['referenced']} referenced "
+            f"({stats['shared_references']} duplicate uploads deduplicated), {stats['orphans']} unreferenced"
+        )
+        verb = 'would be deleted' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"🧹 {stats['deleted']} orphan files {verb} ({filesizeformat(stats['freed_bytes'])})"
+        ))
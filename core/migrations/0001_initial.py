@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('booking_confirmation_client', 'Confirmação de Reserva (Cliente)'), ('booking_notification_professional', 'Nova Reserva (Profissional)'), ('booking_status_update', 'Atualização de Reserva (Cliente)'), ('professional_registration_admin', 'Novo Cadastro (Admin)'), ('professional_activation', 'Conta Ativada (Profissional)')], max_length=50, verbose_name='Tipo')),
+                ('object_id', models.PositiveBigIntegerField(help_text='ID da reserva ou do profissional')),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Destinatário')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sent', 'Enviado'), ('failed', 'Falhou')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima tentativa')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+            ],
+            options={
+                'verbose_name': 'Email na Fila',
+                'verbose_name_plural': 'Fila de Emails',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_emailo_status_a125e4_idx')],
+            },
+        ),
+    ]
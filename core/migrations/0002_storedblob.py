@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Ficheiro')),
+                ('size', models.BigIntegerField(blank=True, null=True, verbose_name='Tamanho (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('orphaned_since', models.DateTimeField(blank=True, null=True, verbose_name='Sem referências desde')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('counted_at', models.DateTimeField(blank=True, null=True, verbose_name='Contado em')),
+            ],
+            options={
+                'verbose_name': 'Ficheiro de Media',
+                'verbose_name_plural': 'Ficheiros de Media',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['ref_count', 'orphaned_since'], name='core_stored_ref_cou_21739f_idx')],
+            },
+        ),
+    ]
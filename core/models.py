@@ -0,0 +1,105 @@
+from django.db import models
+from django.utils import timezone
+
+
+class EmailOutbox(models.Model):
+    """Queued transactional email, delivered by the send_queued_emails worker"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendente'),
+        (STATUS_SENT, 'Enviado'),
+        (STATUS_FAILED, 'Falhou'),
+    ]
+    
+    KIND_CHOICES = [
+        ('booking_confirmation_client', 'Confirmação de Reserva (Cliente)'),
+        ('booking_notification_professional', 'Nova Reserva (Profissional)'),
+        ('booking_status_update', 'Atualização de Reserva (Cliente)'),
+        ('professional_registration_admin', 'Novo Cadastro (Admin)'),
+        ('professional_activation', 'Conta Ativada (Profissional)'),
+    ]
+    
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES, verbose_name="Tipo")
+    object_id = models.PositiveBigIntegerField(help_text="ID da reserva ou do profissional")
+    payload = models.JSONField(default=dict, blank=True)
+    recipient = models.EmailField(verbose_name="Destinatário")
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentativas")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Próxima tentativa")
+    last_error = models.TextField(blank=True, default='', verbose_name="Último erro")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado em")
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Email na Fila"
+        verbose_name_plural = "Fila de Emails"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} → {self.recipient} ({self.get_status_display()})"
+
+
+class StoredBlob(models.Model):
+    """Content-addressed media file (core.storage) and its reference count, maintained by sweep_media"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Ficheiro")
+    size = models.BigIntegerField(null=True, blank=True, verbose_name="Tamanho (bytes)")
+    ref_count = models.PositiveIntegerField(default=0, verbose_name="Referências")
+    orphaned_since = models.DateTimeField(null=True, blank=True, verbose_name="Sem referências desde")
+    created_at = models.DateTimeField(auto_now_add=True)
+    counted_at = models.DateTimeField(null=True, blank=True, verbose_name="Contado em")
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Ficheiro de Media"
+        verbose_name_plural = "Ficheiros de Media"
+        indexes = [
+            models.Index(fields=['ref_count', 'orphaned_since']),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """Background job run by the run_worker command (see core.jobs)"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendente'),
+        (STATUS_RUNNING, 'Em execução'),
+        (STATUS_DONE, 'Concluído'),
+        (STATUS_DEAD, 'Falhou definitivamente'),
+    ]
+    
+    name = models.CharField(max_length=200, verbose_name="Função", help_text="Caminho da função (módulo.função)")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Argumentos")
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Executar em")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Reservado até")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentativas")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Máximo de tentativas")
+    last_error = models.TextField(blank=True, default='', verbose_name="Último erro")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminado em")
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Tarefa em Segundo Plano"
+        verbose_name_plural = "Tarefas em Segundo Plano"
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
@@ -0,0 +1,130 @@
+"""
+Full-page cache of public pages for anonymous visitors.
+
+Pages decorated with cache_public_page() are rendered once per path, query
+string and language and served from the Django cache to every anonymous GET.
+Requests of logged-in clients/professionals (client_id/professional_id in the
+session, or an authenticated user) and requests with pending flash messages
+always reach the view, since base.html renders those.
+
+Each page declares the tags it depends on ("catalog", "category:<id>", ...).
+Every tag has a version in the shared cache (core.cache.shared_cache) and the
+versions are part of the page key, so invalidate_pages() makes the affected
+pages unreachable in every process at once; the signal handlers of the models
+the pages are built from call it (see services.signals and
+services.search_index). The pages themselves are kept in the default cache and
+PAGE_CACHE_TIMEOUT only bounds how long unreachable entries are kept.
+
+Presence ("online", "visto há ...") is written with update() and sends no
+signal, so pages listing professionals are cached for
+LISTING_PAGE_CACHE_TIMEOUT instead, short enough for the badges to follow.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.translation import get_language
+
+from .cache import shared_cache
+
+
+KEY_PREFIX = 'pages'
+SESSION_ACCOUNT_KEYS = ('client_id', 'professional_id')
+
+
+def _tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def _bump(keys):
+    shared_cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def invalidate_pages(*tags):
+    """Invalidate every cached page depending on one of tags"""
+    keys = [_tag_key(tag) for tag in tags]
+    if not keys:
+        return
+    _bump(keys)
+    if transaction.get_connection().in_atomic_block:
+        # A page rendered before the commit would cache the old data under the new version
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def _tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = shared_cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            shared_cache.add(key, uuid.uuid4().hex, None)
+        versions.update(shared_cache.get_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+def is_cacheable_request(request):
+    """Whether the page can be the one every anonymous visitor gets"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    session = getattr(request, 'session', None)
+    if session is not None and (any(session.get(key) for key in SESSION_ACCOUNT_KEYS) or session.get('_messages')):
+        return False
+    return 'messages' not in request.COOKIES
+
+
+def page_key(request, tags):
+    parts = [
+        getattr(settings, 'PAGE_CACHE_VERSION', ''),
+        get_language() or '',
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        *_tag_versions(tags),
+    ]
+    return f'{KEY_PREFIX}:page:' + hashlib.md5('\n'.join(parts).encode()).hexdigest()
+
+
+def cache_public_page(*tags, timeout_setting='PAGE_CACHE_TIMEOUT'):
+    """
+    Serve the view from the page cache to anonymous visitors.
+    tags are strings or callables (request, *args, **kwargs) -> list of tags.
+    timeout_setting names the setting with the lifetime of the cached pages:
+    pages showing data that changes without signals (presence) use a short one.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            page_tags = []
+            for tag in tags:
+                page_tags.extend(tag(request, *args, **kwargs) if callable(tag) else [tag])
+            key = page_key(request, page_tags)
+
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Page-Cache'] = 'hit'
+                return response
+
+            response = view(request, *args, **kwargs)
+            # Only plain 200s that don't depend on the visitor (no cookies, no CSRF token rendered)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            ):
+                cache.set(key, (response.content, response['Content-Type']), getattr(settings, timeout_setting, 3600))
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapped
+    return decorator
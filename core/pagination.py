@@ -0,0 +1,171 @@
+"""
+Keyset (cursor) pagination, cached totals and estimated counts for listings.
+
+Pages are fetched with "WHERE (ordering columns) after/before the cursor
+row ... LIMIT per_page + 1", so the cost doesn't grow with the page number
+and rows don't shift between pages when new ones are inserted. Cursors are
+signed tokens holding the ordering values of the boundary row.
+
+EstimatedCountPaginator is meant for admin changelists of large tables.
+"""
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+CURSOR_SALT = 'core.pagination.cursor'
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a queryset (of model instances or .values() rows).
+
+    ordering is a list of field names ('-field' for descending). The fields
+    must be non-null and the last one unique, so every row has a distinct position.
+    """
+
+    def __init__(self, queryset, ordering, per_page=20):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        self.per_page = per_page
+
+    def _encode(self, direction, obj):
+        values = []
+        for name, _ in self.fields:
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            values.append(value if isinstance(value, (int, str)) else str(value))
+        return signing.dumps([direction, values], salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            return None, None
+        if direction not in ('next', 'previous') or len(values) != len(self.fields):
+            return None, None
+        return direction, values
+
+    def _beyond(self, values, backwards):
+        """Rows after the cursor values in the ordering (before them if backwards)"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != backwards else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (previous_name, _) in enumerate(self.fields[:i]):
+                clause &= Q(**{previous_name: values[j]})
+            condition |= clause
+        return condition
+
+    def page(self, cursor=None):
+        """Return the page the cursor points to (the first page if it is missing or invalid)"""
+        direction, values = self._decode(cursor) if cursor else (None, None)
+
+        if direction == 'previous':
+            reversed_ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+            rows = list(self.queryset.filter(self._beyond(values, backwards=True)).order_by(*reversed_ordering)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset
+            if direction == 'next':
+                queryset = queryset.filter(self._beyond(values, backwards=False))
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = direction == 'next'
+
+        return KeysetPage(
+            rows,
+            next_cursor=self._encode('next', rows[-1]) if has_next and rows else None,
+            previous_cursor=self._encode('previous', rows[0]) if has_previous and rows else None,
+        )
+
+
+def cached_count(queryset, prefix, timeout=60):
+    """
+    COUNT(*) of a queryset, cached for timeout seconds.
+
+    The key is derived from the SQL, so each filter combination gets its own entry.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    key = f'count:{prefix}:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
+
+
+def cursor_querystring(request, cursor):
+    """Current query string with the cursor parameter replaced (other filters kept)"""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return '?' + params.urlencode()
+
+
+def estimated_row_count(model, using='default'):
+    """Planner estimate of a table's row count (PostgreSQL pg_class.reltuples), None if unavailable"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that were never vacuumed/analyzed
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) on large unfiltered tables.
+
+    When the queryset has no filters and the table estimate is at least
+    EXACT_COUNT_THRESHOLD rows, the estimate is used as the count. Filtered
+    querysets and small tables are counted exactly.
+    """
+    EXACT_COUNT_THRESHOLD = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.EXACT_COUNT_THRESHOLD:
+                return estimate
+        return super().count
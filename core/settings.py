@@ -55,6 +55,44 @@ if os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('RAILWAY_PUBLIC_DOMAI
 REPORTS_TO_BLOCK_PROFESSIONAL = int(os.environ.get('REPORTS_TO_BLOCK_PROFESSIONAL', '5'))
 REPORTS_TO_BLOCK_CLIENT = int(os.environ.get('REPORTS_TO_BLOCK_CLIENT', '5'))
 
+# Profile view tracking (views are buffered in memory and written in batches)
+PROFILE_VIEW_BATCH_SIZE = int(os.environ.get('PROFILE_VIEW_BATCH_SIZE', '100'))
+PROFILE_VIEW_FLUSH_INTERVAL = int(os.environ.get('PROFILE_VIEW_FLUSH_INTERVAL', '10'))  # seconds
+PROFILE_VIEW_RETENTION_DAYS = int(os.environ.get('PROFILE_VIEW_RETENTION_DAYS', '90'))  # raw rows kept after rollup
+
+# Presence of professionals (kept in the cache, last_seen written in batches)
+PRESENCE_TOUCH_INTERVAL = int(os.environ.get('PRESENCE_TOUCH_INTERVAL', '60'))  # seconds between queued writes per professional
+PRESENCE_BATCH_SIZE = int(os.environ.get('PRESENCE_BATCH_SIZE', '200'))
+PRESENCE_FLUSH_INTERVAL = int(os.environ.get('PRESENCE_FLUSH_INTERVAL', '30'))  # seconds
+
+# In-memory copies of the service catalog and the Province -> City -> Neighborhood tree
+# (core.cache.VersionedLoader). They are reloaded when their version is bumped by model
+# signals; the TTL (seconds) only matters when the shared cache is per-process (LocMemCache
+# in development), where other processes never see the bump.
+SERVICE_CATALOG_TTL = int(os.environ.get('SERVICE_CATALOG_TTL', '300'))
+LOCATION_TREE_TTL = int(os.environ.get('LOCATION_TREE_TTL', '300'))
+
+# Full-page cache of public pages for anonymous visitors (invalidated by model signals, see core.page_cache)
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '3600'))  # seconds, evicts pages made unreachable by an invalidation
+LISTING_PAGE_CACHE_TIMEOUT = int(os.environ.get('LISTING_PAGE_CACHE_TIMEOUT', '60'))  # seconds, pages with presence badges (not invalidated by signals)
+PAGE_CACHE_VERSION = os.environ.get('PAGE_CACHE_VERSION', os.environ.get('RAILWAY_GIT_COMMIT_SHA', ''))  # new deploys don't serve pages of old templates
+
+# Rendered professional cards (keyed on updated_at, rating and presence, see core.templatetags.professional_cards)
+CARD_CACHE_TIMEOUT = int(os.environ.get('CARD_CACHE_TIMEOUT', '86400'))  # seconds, only evicts cards that are no longer requested
+
+# Idempotency keys of the booking confirmation form
+BOOKING_SUBMISSION_RETENTION_DAYS = int(os.environ.get('BOOKING_SUBMISSION_RETENTION_DAYS', '7'))
+
+# Portfolio uploads (validated while streaming, processed by a bounded thread pool)
+PORTFOLIO_UPLOAD_MAX_SIZE = int(os.environ.get('PORTFOLIO_UPLOAD_MAX_SIZE', str(10 * 1024 * 1024)))  # bytes per image
+PORTFOLIO_UPLOAD_MAX_FILES = int(os.environ.get('PORTFOLIO_UPLOAD_MAX_FILES', '10'))
+PORTFOLIO_UPLOAD_WORKERS = int(os.environ.get('PORTFOLIO_UPLOAD_WORKERS', '4'))
+PORTFOLIO_IMAGE_MAX_SIDE = int(os.environ.get('PORTFOLIO_IMAGE_MAX_SIDE', '2048'))  # px, larger uploads are downscaled
+
+# Uploaded images are stored by content hash (core.storage), on this backend
+MEDIA_BLOB_BACKEND = os.environ.get('MEDIA_BLOB_BACKEND', 'django.core.files.storage.FileSystemStorage')  # e.g. storages.backends.s3.S3Storage
+MEDIA_ORPHAN_GRACE_HOURS = int(os.environ.get('MEDIA_ORPHAN_GRACE_HOURS', '24'))  # unreferenced files kept this long by sweep_media
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -76,6 +114,7 @@ INSTALLED_APPS = [
     'allauth.socialaccount.providers.google',
     
     # Local apps
+    'core',
     'accounts',
     'locations',
     'services',
@@ -96,6 +135,7 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',  # Required for django-allauth
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.ActorMiddleware',  # request.actor (cliente/profissional da sessão) e presença (last_seen)
 ]
 
 # Authentication backends
@@ -198,6 +238,31 @@ except ImportError:
         }
 
 
+# Caches: 'default' is per-process memory (presence, cards, pages, counts: written on the
+# hot path). 'shared' holds the version keys every process must agree on (catalog,
+# location tree, page tags): a per-process LRU in front of the database cache table, kept
+# coherent across workers and containers with PostgreSQL LISTEN/NOTIFY (see core.cache).
+# Without PostgreSQL (local development) both are LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+}
+if DATABASES['default']['ENGINE'] in ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2'):
+    CACHES['shared'] = {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'django_cache',  # python manage.py createcachetable
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '5000')),
+            'LOCAL_MAX_ENTRIES': int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', '1000')),
+            'LOCAL_TIMEOUT': int(os.environ.get('CACHE_LOCAL_TIMEOUT', '300')),  # seconds, bounds staleness if a notification is lost
+        },
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -266,6 +331,17 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@conhecesalgue
 BASE_URL = os.environ.get('BASE_URL', 'http://localhost:8000')
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', DEFAULT_FROM_EMAIL)
 
+# Email outbox (emails are queued and sent by `python manage.py send_queued_emails`)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', '60'))  # seconds, doubled per attempt
+
+# Background jobs (core.jobs), run by: python manage.py run_worker
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', '4'))  # threads per worker (1 on SQLite)
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))  # then the job is left as dead
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', '30'))  # seconds, doubled per attempt
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', '600'))  # a running job is reclaimed after this
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', '7'))  # finished jobs kept for inspection
+
 # CSRF Trusted Origins (para Railway e domínios de produção)
 # Django não aceita wildcards (*), então usamos middleware customizado para aceitar domínios Railway dinamicamente
 CSRF_TRUSTED_ORIGINS = []
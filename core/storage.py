@@ -0,0 +1,252 @@
+"""
+Content-addressed media storage.
+
+Files are stored under their SHA-256 ("blobs/ab/cd/abcd....jpg"), so the same
+photo uploaded twice, to a profile and to a portfolio or by two professionals,
+is written once and both rows point to the same blob. The actual reads and
+writes go to a wrapped backend (MEDIA_BLOB_BACKEND): FileSystemStorage by
+default, or any django-storages backend such as
+"storages.backends.s3.S3Storage".
+
+Because a blob can be shared, delete() never removes it. Reference counts are
+kept in StoredBlob by the sweep_media command, which counts the references of
+every registered file field and deletes blobs that stayed unreferenced for
+MEDIA_ORPHAN_GRACE_HOURS. Saving content that already has a blob restarts
+that grace period.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+EXTENSION_ALIASES = {
+    '.jpeg': '.jpg',
+}
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """Storage naming files by content hash and reusing existing blobs"""
+
+    def __init__(self, backend=None, prefix=None):
+        self.backend_path = backend or getattr(settings, 'MEDIA_BLOB_BACKEND', 'django.core.files.storage.FileSystemStorage')
+        self.prefix = prefix or getattr(settings, 'MEDIA_BLOB_PREFIX', 'blobs')
+        self.backend = import_string(self.backend_path)()
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f'{self.prefix}/')
+
+    def blob_name(self, name, content):
+        """Hash name of content (reads it in chunks, leaves it rewound)"""
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        extension = os.path.splitext(name)[1].lower()
+        extension = EXTENSION_ALIASES.get(extension, extension)
+        hexdigest = digest.hexdigest()
+        return f'{self.prefix}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, see _save()
+        return name
+
+    def _save(self, name, content):
+        blob_name = self.blob_name(name, content)
+        if self.backend.exists(blob_name):
+            self.reclaim(blob_name)
+            return blob_name
+
+        saved_name = self.backend.save(blob_name, content)
+        if saved_name != blob_name:
+            # A concurrent upload of the same content won the name; the bytes are identical
+            self.backend.delete(saved_name)
+        return blob_name
+
+    def reclaim(self, name):
+        """Restart the grace period of a reused blob, so sweep_media doesn't delete it under the new row"""
+        from .models import StoredBlob
+        StoredBlob.objects.filter(name=name).exclude(orphaned_since=None).update(orphaned_since=None)
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def delete(self, name):
+        # Blobs may be shared: unreferenced ones are removed by sweep_media
+        if not self.is_blob(name):
+            self.backend.delete(name)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+    def iter_blobs(self):
+        """Yield the name of every stored blob (walks the two fan-out levels)"""
+        try:
+            first_levels, _ = self.backend.listdir(self.prefix)
+        except FileNotFoundError:
+            return
+        for first in sorted(first_levels):
+            second_levels, _ = self.backend.listdir(f'{self.prefix}/{first}')
+            for second in sorted(second_levels):
+                _, files = self.backend.listdir(f'{self.prefix}/{first}/{second}')
+                for file_name in sorted(files):
+                    yield f'{self.prefix}/{first}/{second}/{file_name}'
+
+
+_media_storage = None
+
+
+def media_storage():
+    """Storage of uploaded images (callable so models and migrations don't pin an instance)"""
+    global _media_storage
+    if _media_storage is None:
+        _media_storage = ContentAddressedStorage()
+    return _media_storage
+
+
+def referenced_names():
+    """Counter of stored names referenced by the registered image fields and their renditions"""
+    from collections import Counter
+    from django.apps import apps
+    from .images import IMAGE_FIELDS, RENDITION_FORMATS
+
+    references = Counter()
+    for label, (field_name, _) in IMAGE_FIELDS.items():
+        rows = apps.get_model(label)._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        for name, renditions in rows.values_list(field_name, f'{field_name}_renditions').iterator(chunk_size=2000):
+            references[name] += 1
+            for fmt in RENDITION_FORMATS:
+                for rendition_name in (renditions or {}).get(fmt, {}).values():
+                    references[rendition_name] += 1
+    return references
+
+
+def is_referenced(name):
+    """Whether a row currently points to name, as its image or one of its renditions"""
+    from django.apps import apps
+    from django.db.models import TextField
+    from django.db.models.functions import Cast
+    from .images import IMAGE_FIELDS
+
+    for label, (field_name, _) in IMAGE_FIELDS.items():
+        manager = apps.get_model(label)._default_manager
+        if manager.filter(**{field_name: name}).exists():
+            return True
+        renditions = manager.annotate(renditions_text=Cast(f'{field_name}_renditions', TextField()))
+        if renditions.filter(renditions_text__contains=f'"{name}"').exists():
+            return True
+    return False
+
+
+def sweep_media(grace_hours=None, dry_run=False, batch_size=500):
+    """
+    Recount blob references and delete blobs unreferenced for more than grace_hours.
+    Returns a dict of statistics.
+    """
+    from datetime import timedelta
+    from itertools import chain
+    from django.utils import timezone
+    from .models import StoredBlob
+
+    if grace_hours is None:
+        grace_hours = getattr(settings, 'MEDIA_ORPHAN_GRACE_HOURS', 24)
+    storage = media_storage()
+    now = timezone.now()
+    references = referenced_names()
+
+    # Inventory: register blobs found in the storage, forget rows whose file is gone
+    stored = set(storage.iter_blobs())
+    known = set(StoredBlob.objects.values_list('name', flat=True))
+    new_names = stored - known
+    if not dry_run:
+        StoredBlob.objects.bulk_create(
+            [StoredBlob(name=name, size=storage.size(name)) for name in sorted(new_names)],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+        missing = sorted(known - stored)
+        for start in range(0, len(missing), batch_size):
+            StoredBlob.objects.filter(name__in=missing[start:start + batch_size]).delete()
+
+    # Recount (a dry run counts the new blobs without registering them)
+    rows = StoredBlob.objects.iterator(chunk_size=batch_size)
+    if dry_run:
+        rows = chain(rows, (StoredBlob(name=name, size=storage.size(name)) for name in sorted(new_names)))
+    blobs = []
+    for blob in rows:
+        if blob.name not in stored:
+            continue
+        blob.ref_count = references.get(blob.name, 0)
+        if blob.ref_count:
+            blob.orphaned_since = None
+        elif blob.orphaned_since is None:
+            blob.orphaned_since = now
+        blob.counted_at = now
+        blobs.append(blob)
+    if not dry_run:
+        StoredBlob.objects.bulk_update(blobs, ['ref_count', 'counted_at'], batch_size=batch_size)
+        # orphaned_since is only moved conditionally: an upload may have reclaimed a blob since it was read
+        referenced = [blob.name for blob in blobs if blob.ref_count]
+        orphaned = [blob.name for blob in blobs if not blob.ref_count]
+        for start in range(0, len(referenced), batch_size):
+            StoredBlob.objects.filter(name__in=referenced[start:start + batch_size]).exclude(
+                orphaned_since=None).update(orphaned_since=None)
+        for start in range(0, len(orphaned), batch_size):
+            StoredBlob.objects.filter(name__in=orphaned[start:start + batch_size], orphaned_since=None).update(
+                orphaned_since=now)
+
+    # Sweep orphans past the grace period (it covers uploads whose rows are not committed yet).
+    # references was taken before the slow listing, so each blob is checked again right before
+    # its row is deleted, and only if it is still an orphan past the cutoff (not reclaimed meanwhile).
+    cutoff = now - timedelta(hours=grace_hours)
+    expired = [
+        blob for blob in blobs
+        if not blob.ref_count and blob.orphaned_since is not None and blob.orphaned_since <= cutoff
+    ]
+    deleted = freed = 0
+    for blob in expired:
+        if not dry_run:
+            if is_referenced(blob.name):
+                continue
+            removed, _ = StoredBlob.objects.filter(
+                name=blob.name, ref_count=0, orphaned_since__lte=cutoff,
+            ).delete()
+            if not removed:
+                continue
+            storage.backend.delete(blob.name)
+        deleted += 1
+        freed += blob.size or 0
+
+    return {
+        'blobs': len(stored),
+        'referenced': sum(1 for blob in blobs if blob.ref_count),
+        'shared_references': sum(max(blob.ref_count - 1, 0) for blob in blobs),
+        'orphans': sum(1 for blob in blobs if not blob.ref_count),
+        'deleted': deleted,
+        'freed_bytes': freed,
+    }
@@ -0,0 +1,53 @@
+"""
+{% responsive_image obj 'field' sizes='80px' alt='...' class='...' %}
+
+Renders the WebP/JPEG renditions of an image field (see core.images) as a
+<picture> with srcset, so the browser downloads the smallest file that fits.
+Falls back to the original upload while the renditions are not ready.
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def _srcset(storage, renditions):
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(renditions.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.simple_tag
+def responsive_image(instance, field_name, sizes='100vw', **attrs):
+    fieldfile = getattr(instance, field_name, None)
+    if not fieldfile:
+        return ''
+
+    attrs.setdefault('alt', '')
+    attrs.setdefault('loading', 'lazy')
+    attrs['decoding'] = 'async'
+    renditions = getattr(instance, f'{field_name}_renditions', None) or {}
+
+    if renditions.get('source') != fieldfile.name or not renditions.get('jpeg'):
+        return format_html('<img src="{}"{}>', fieldfile.url, _attributes(attrs))
+
+    storage = fieldfile.storage
+    largest = max(renditions['jpeg'], key=int)
+    width = getattr(instance, f'{field_name}_width', None)
+    height = getattr(instance, f'{field_name}_height', None)
+    if width and height:
+        attrs.setdefault('width', width)
+        attrs.setdefault('height', height)
+
+    return format_html(
+        '<picture class="contents"><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(storage, renditions.get('webp', {})), sizes,
+        storage.url(renditions['jpeg'][largest]), _srcset(storage, renditions['jpeg']), sizes,
+        _attributes(attrs),
+    )
+
+
+def _attributes(attrs):
+    return format_html_join('', ' {}="{}"', sorted(attrs.items()))
@@ -0,0 +1,74 @@
+"""
+{% professional_cards professionals [compact=True] as cards %}
+{% for professional, card in cards %}<div ...>{{ card }} ...actions...</div>{% endfor %}
+
+Renders the professional card (templates/accounts/professional_card.html:
+photo, name, online badge, stars, last seen, bio) through a fragment cache.
+A card's key holds everything it shows that can change: updated_at (saves,
+counter updates), the rating, the presence text and whether the picture
+renditions are ready, so cards never need explicit invalidation. The whole
+list is read with one get_many and only the misses are rendered (and stored
+with one set_many).
+"""
+import hashlib
+from decimal import ROUND_HALF_UP, Decimal
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+KEY_PREFIX = 'cards:professional'
+TEMPLATE = 'accounts/professional_card.html'
+
+
+def _card_state(professional):
+    """Values shown by the card that don't come from the row itself"""
+    return {
+        'is_online': professional.is_online(),
+        'last_seen_display': professional.get_last_seen_display(),
+    }
+
+
+def card_key(professional, state, compact=False):
+    updated_at = professional.updated_at.timestamp() if professional.updated_at else ''
+    presence = 'online' if state['is_online'] else state['last_seen_display']
+    # Renditions are written by a job after the save (without touching updated_at) and
+    # may still be those of the previous picture, so key on the picture they were made from
+    renditions = (professional.profile_picture_renditions or {}).get('source', '')
+    # The presence text has spaces and accents, hash the varying part so the key is safe for any backend
+    version = hashlib.md5(f'{updated_at}|{professional.average_rating}|{renditions}|{presence}'.encode()).hexdigest()
+    variant = 'compact' if compact else 'full'
+    return f"{KEY_PREFIX}:{getattr(settings, 'PAGE_CACHE_VERSION', '')}:{variant}:{professional.id}:{version}"
+
+
+def _stars(rating):
+    filled = int(Decimal(rating or 0).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    return [position <= filled for position in range(1, 6)]
+
+
+@register.simple_tag
+def professional_cards(professionals, compact=False):
+    """List of (professional, card html) pairs (one cache round-trip for the whole list)"""
+    professionals = list(professionals)
+    states = [_card_state(professional) for professional in professionals]
+    keys = [card_key(professional, state, compact) for professional, state in zip(professionals, states)]
+    cached = cache.get_many(keys)
+
+    rendered = {}
+    for professional, state, key in zip(professionals, states, keys):
+        if key not in cached and key not in rendered:
+            rendered[key] = render_to_string(TEMPLATE, {
+                'professional': professional,
+                'compact': compact,
+                'stars': _stars(professional.average_rating),
+                **state,
+            })
+    if rendered:
+        cache.set_many(rendered, getattr(settings, 'CARD_CACHE_TIMEOUT', 86400))
+
+    cached.update(rendered)
+    return [(professional, mark_safe(cached[key])) for professional, key in zip(professionals, keys)]
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .jobs import claim_jobs, enqueue, job, retry_delay, run_job, work
+from .models import Job
+
+
+calls = []
+
+
+@job(max_attempts=3)
+def failing_job(label):
+    calls.append(label)
+    raise RuntimeError('falhou')
+
+
+@job
+def noop_job(label):
+    calls.append(label)
+
+
+def expire_lease(job_id):
+    Job.objects.filter(pk=job_id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+
+@override_settings(JOB_RETRY_DELAY=30, JOB_LEASE_SECONDS=600)
+class JobQueueTests(TestCase):
+    """Retries, dead letters and leases of the database job queue"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_failure_is_retried_with_backoff(self):
+        queued = enqueue(failing_job, label='a')
+        [claimed] = claim_jobs(10)
+        before = timezone.now()
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(run_job(claimed), Job.STATUS_PENDING)
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+        self.assertEqual(queued.last_error, 'RuntimeError: falhou')
+        self.assertGreaterEqual(queued.run_at, before + timedelta(seconds=30))
+        self.assertEqual(claim_jobs(10), [])  # not due yet
+
+        Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        [claimed] = claim_jobs(10)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            run_job(claimed)
+        queued.refresh_from_db()
+        self.assertGreaterEqual(queued.run_at, timezone.now() + timedelta(seconds=59))
+        self.assertEqual(retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(retry_delay(2), timedelta(seconds=60))
+        self.assertEqual(retry_delay(20), timedelta(hours=1))
+
+    def test_job_is_dead_after_max_attempts(self):
+        queued = enqueue(failing_job, label='b')
+        with self.assertLogs('core.jobs', 'WARNING') as logs:
+            for _ in range(3):
+                Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+                work(loop=False)
+        self.assertIn('failed for good after 3 attempts', logs.output[-1])
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.STATUS_DEAD)
+        self.assertEqual(queued.attempts, 3)
+        self.assertIsNotNone(queued.finished_at)
+        self.assertEqual(calls, ['b'] * 3)
+        Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_expired_lease_is_reclaimed(self):
+        queued = enqueue(noop_job, label='c')
+        [first] = claim_jobs(10)
+        self.assertEqual(claim_jobs(10), [])  # leased
+
+        expire_lease(queued.pk)
+        [second] = claim_jobs(10)
+        self.assertEqual(second.attempts, 2)
+        self.assertEqual(run_job(second), Job.STATUS_DONE)
+
+    def test_expired_lease_on_last_attempt_is_dead(self):
+        queued = enqueue(failing_job, label='d')
+        Job.objects.filter(pk=queued.pk).update(status=Job.STATUS_RUNNING, attempts=3)
+        expire_lease(queued.pk)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(claim_jobs(10), [])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.STATUS_DEAD)
+
+    def test_result_after_lost_lease_is_dropped(self):
+        queued = enqueue(noop_job, label='e')
+        [stale] = claim_jobs(10)
+        expire_lease(queued.pk)
+        [current] = claim_jobs(10)
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertIsNone(run_job(stale))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.STATUS_RUNNING)
+        self.assertEqual(run_job(current), Job.STATUS_DONE)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.STATUS_DONE)
@@ -8,6 +8,8 @@ from django.conf.urls.static import static
 from django.shortcuts import render
 from django.http import JsonResponse
 
+from core.page_cache import cache_public_page
+
 # Customize admin site
 admin.site.site_header = "Conheces Alguém? - Administração"
 admin.site.site_title = "Conheces Alguém? Admin"
@@ -21,37 +23,28 @@ def healthcheck(request):
     return HttpResponse("ok", content_type="text/plain", status=200)
 
 
+@cache_public_page('catalog')
 def home(request):
     """Homepage with service categories and search"""
-    from services.models import ServiceCategory
-    from django.db.models import Q
+    from services.catalog import active_categories, search_categories
     
-    categories = ServiceCategory.objects.filter(is_active=True).order_by('sort_order', 'name')
+    categories = active_categories()
     search_query = request.GET.get('search', '').strip()
     search_results = None
     
     if search_query:
-        # Search in category names, descriptions, and keywords
-        search_results = ServiceCategory.objects.filter(
-            is_active=True
-        ).filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(search_keywords__icontains=search_query)
-        ).distinct().order_by('sort_order', 'name')
-        
+        # Full-text search (accent-insensitive, ranked) in names, keywords and descriptions
         # If no results, show all categories
-        if not search_results.exists():
-            search_results = None
+        search_results = search_categories(search_query) or None
     
     # Limit to 7 categories for homepage, show rest in "See more" link
     featured_categories = categories[:7]
-    has_more_categories = categories.count() > 7
+    has_more_categories = len(categories) > 7
     
     context = {
         'service_categories': featured_categories,
         'has_more_categories': has_more_categories,
-        'total_categories': categories.count(),
+        'total_categories': len(categories),
         'search_query': search_query,
         'search_results': search_results,
     }
@@ -71,14 +64,17 @@ def service_category(request, slug):
         raise Http404
 
 
+@cache_public_page()
 def privacy_policy(request):
     """Privacy Policy page"""
     return render(request, 'privacy_policy.html')
 
+@cache_public_page()
 def security(request):
     """Security information page"""
     return render(request, 'security.html')
 
+@cache_public_page()
 def safety_recommendations(request):
     """Safety recommendations page"""
     return render(request, 'safety_recommendations.html')
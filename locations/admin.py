@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from .models import Province, City, Neighborhood
 
 
@@ -8,9 +9,13 @@ class ProvinceAdmin(admin.ModelAdmin):
     search_fields = ['name', 'code']
     readonly_fields = ['created_at']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_city_count=Count('cities'))
+    
     def city_count(self, obj):
-        return obj.cities.count()
+        return obj._city_count
     city_count.short_description = 'Número de Cidades'
+    city_count.admin_order_field = '_city_count'
 
 
 class NeighborhoodInline(admin.TabularInline):
@@ -24,18 +29,33 @@ class CityAdmin(admin.ModelAdmin):
     list_display = ['name', 'province', 'neighborhood_count']
     list_filter = ['province']
     search_fields = ['name', 'province__name']
+    list_select_related = ['province']
     inlines = [NeighborhoodInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_neighborhood_count=Count('neighborhoods'))
+    
     def neighborhood_count(self, obj):
-        return obj.neighborhoods.count()
+        return obj._neighborhood_count
     neighborhood_count.short_description = 'Número de Bairros'
+    neighborhood_count.admin_order_field = '_neighborhood_count'
+
+
+class CityListFilter(admin.RelatedFieldListFilter):
+    """City filter that loads the provinces used by City.__str__ in the same query"""
+    
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin) or City._meta.ordering
+        cities = City.objects.select_related('province').order_by(*ordering)
+        return [(city.pk, str(city)) for city in cities]
 
 
 @admin.register(Neighborhood)
 class NeighborhoodAdmin(admin.ModelAdmin):
     list_display = ['name', 'city', 'province']
-    list_filter = ['city__province', 'city']
+    list_filter = ['city__province', ('city', CityListFilter)]
     search_fields = ['name', 'city__name']
+    list_select_related = ['city__province']
     
     def province(self, obj):
         return obj.city.province.name
@@ -0,0 +1,18 @@
+"""
+Signal handlers that invalidate the cached location tree
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Province, City, Neighborhood
+from .tree import tree
+
+
+@receiver(post_save, sender=Province)
+@receiver(post_delete, sender=Province)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=Neighborhood)
+@receiver(post_delete, sender=Neighborhood)
+def location_changed(sender, **kwargs):
+    tree.bump()
@@ -0,0 +1,57 @@
+"""
+Pre-serialized Province -> City -> Neighborhood tree for the booking wizard.
+
+The whole tree is serialized once to compact JSON (and gzipped) and kept in
+memory with its ETag until a location changes (core.cache.VersionedLoader:
+the version is bumped by the location signals, LOCATION_TREE_TTL bounds the
+copy when the shared cache is per-process).
+
+Format: {"provinces": [[id, name, [[city_id, name, [[neighborhood_id, name], ...]], ...]], ...]}
+"""
+import gzip
+import hashlib
+import json
+from collections import defaultdict
+
+from core.cache import VersionedLoader
+
+from .models import Province, City, Neighborhood
+
+
+VERSION_KEY = 'locations:tree:version'
+
+
+class LocationTreeBundle:
+    """Serialized tree: JSON body, gzipped body and the strong ETag of each"""
+
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9)
+        self.digest = hashlib.sha256(body).hexdigest()[:20]
+        self.etag = f'"{self.digest}"'
+        self.gzipped_etag = f'"{self.digest}-gz"'
+
+
+def _build_bundle():
+    neighborhoods = defaultdict(list)
+    for neighborhood_id, name, city_id in Neighborhood.objects.order_by('name').values_list('id', 'name', 'city_id'):
+        neighborhoods[city_id].append([neighborhood_id, name])
+
+    cities = defaultdict(list)
+    for city_id, name, province_id in City.objects.order_by('name').values_list('id', 'name', 'province_id'):
+        cities[province_id].append([city_id, name, neighborhoods.get(city_id, [])])
+
+    provinces = [
+        [province_id, name, cities.get(province_id, [])]
+        for province_id, name in Province.objects.order_by('name').values_list('id', 'name')
+    ]
+    body = json.dumps({'provinces': provinces}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return LocationTreeBundle(body)
+
+
+tree = VersionedLoader(VERSION_KEY, _build_bundle, 'LOCATION_TREE_TTL')
+
+
+def get_location_tree():
+    """Current LocationTreeBundle (built on first use and after location changes)"""
+    return tree.get()
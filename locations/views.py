@@ -1,6 +1,9 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from .models import Province, City, Neighborhood
+from .tree import get_location_tree
 import json
 
 
@@ -47,3 +50,55 @@ def get_neighborhoods(request, city_id):
             'success': False,
             'error': str(e)
         }, status=400)
+
+
+def location_tree_url():
+    """URL of the tree bundle, versioned by its content so it can be cached long-term"""
+    return f"{reverse('locations:tree')}?v={get_location_tree().digest}"
+
+
+def _accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip ("gzip;q=0" refuses it, "*" stands for it)"""
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def location_tree(request):
+    """The whole Province -> City -> Neighborhood tree as one pre-serialized JSON document"""
+    bundle = get_location_tree()
+    
+    if request.GET.get('v') == bundle.digest:
+        # Versioned URL: the content for this version never changes
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = 'public, max-age=0, must-revalidate'
+    
+    # Each encoding is a different representation, with its own ETag
+    if _accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        body, etag = bundle.gzipped, bundle.gzipped_etag
+    else:
+        body, etag = bundle.body, bundle.etag
+    
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+        if body is bundle.gzipped:
+            response['Content-Encoding'] = 'gzip'
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
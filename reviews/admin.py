@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from core.exports import make_export_actions
 from .models import Review
+from .ratings import recompute_ratings
 
 
 @admin.register(Review)
@@ -21,7 +23,8 @@ class ReviewAdmin(admin.ModelAdmin):
         'comment'
     ]
     readonly_fields = ['created_at', 'updated_at']
-    actions = ['approve_reviews', 'disapprove_reviews']
+    list_select_related = ['booking__professional']
+    actions = ['approve_reviews', 'disapprove_reviews'] + make_export_actions('reviews')
     
     fieldsets = (
         ('Reserva', {
@@ -61,11 +64,22 @@ class ReviewAdmin(admin.ModelAdmin):
     comment_preview.short_description = 'Comentário'
     
     def approve_reviews(self, request, queryset):
+        professional_ids = set(queryset.values_list('booking__professional_id', flat=True))
         updated = queryset.update(is_approved=True)
+        # queryset.update() bypasses Review.save(), so rebuild the affected counters
+        recompute_ratings(professional_ids)
         self.message_user(request, f'{updated} avaliações aprovadas.')
     approve_reviews.short_description = 'Aprovar avaliações selecionadas'
     
     def disapprove_reviews(self, request, queryset):
+        professional_ids = set(queryset.values_list('booking__professional_id', flat=True))
         updated = queryset.update(is_approved=False)
+        recompute_ratings(professional_ids)
         self.message_user(request, f'{updated} avaliações desaprovadas.')
     disapprove_reviews.short_description = 'Desaprovar avaliações selecionadas'
+    
+    def delete_queryset(self, request, queryset):
+        # Bulk delete doesn't call Review.delete(), rebuild the affected counters afterwards
+        professional_ids = set(queryset.values_list('booking__professional_id', flat=True))
+        super().delete_queryset(request, queryset)
+        recompute_ratings(professional_ids)
@@ -0,0 +1,23 @@
+"""
+Management command to rebuild professional rating counters from approved reviews
+Use for repairs (e.g. after editing reviews directly in the database)
+Execute: python manage.py recompute_ratings
+"""
+from django.core.management.base import BaseCommand
+from reviews.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild rating_sum, rating_count and average_rating of all professionals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of professionals written per bulk_update',
+        )
+
+    def handle(self, *args, **options):
+        changed = recompute_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Ratings recomputed: {changed} professionals updated'))
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from bookings.models import Booking
+from .ratings import review_contribution, apply_rating_delta
 
 
 class Review(models.Model):
@@ -20,14 +21,24 @@ class Review(models.Model):
         return f"Review {self.rating}★ por {self.booking.client.name}"
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update professional's average rating
-        if self.booking.professional:
-            self.booking.professional.update_rating()
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Review.objects.select_for_update().filter(pk=self.pk).values('rating', 'is_approved').first()
+            super().save(*args, **kwargs)
+            
+            # Update professional's rating counters with the difference this save made
+            old_sum, old_count = review_contribution(previous['rating'], previous['is_approved']) if previous else (0, 0)
+            new_sum, new_count = review_contribution(self.rating, self.is_approved)
+            apply_rating_delta(self.booking.professional_id, new_sum - old_sum, new_count - old_count)
     
     def delete(self, *args, **kwargs):
-        professional = self.booking.professional
-        super().delete(*args, **kwargs)
-        # Recalculate rating after deletion
-        if professional:
-            professional.update_rating()
+        with transaction.atomic():
+            current = Review.objects.select_for_update().filter(pk=self.pk).values('rating', 'is_approved').first()
+            professional_id = self.booking.professional_id
+            result = super().delete(*args, **kwargs)
+            # Remove this review from the professional's rating counters
+            if current:
+                old_sum, old_count = review_contribution(current['rating'], current['is_approved'])
+                apply_rating_delta(professional_id, -old_sum, -old_count)
+        return result
@@ -0,0 +1,78 @@
+"""
+Rating counters for professionals.
+
+Professional.rating_sum / rating_count hold the totals of approved reviews and are
+adjusted with F() expressions when a review changes, so saving a review never
+re-aggregates all of the professional's reviews. recompute_ratings rebuilds them
+from scratch for repairs.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+from accounts.models import Professional
+
+
+def review_contribution(rating, is_approved):
+    """(sum, count) a review adds to its professional's counters"""
+    if is_approved:
+        return rating, 1
+    return 0, 0
+
+
+def apply_rating_delta(professional_id, sum_delta, count_delta):
+    """Atomically adjust a professional's counters and derive average_rating in the same UPDATE"""
+    if not sum_delta and not count_delta:
+        return
+    
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    Professional.objects.filter(pk=professional_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        average_rating=Case(
+            When(rating_count__lte=-count_delta, then=Value(Decimal('0.00'))),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+    
+    from services.search_index import sync_professional_stats
+    sync_professional_stats([professional_id])
+
+
+def recompute_ratings(professional_ids=None, batch_size=500):
+    """
+    Rebuild rating counters from approved reviews in one GROUP BY pass.
+    Returns the number of professionals whose counters changed.
+    """
+    from .models import Review
+    
+    totals = Review.objects.filter(is_approved=True)
+    professionals = Professional.objects.only('id', 'rating_sum', 'rating_count', 'average_rating')
+    if professional_ids is not None:
+        professional_ids = list(professional_ids)
+        totals = totals.filter(booking__professional_id__in=professional_ids)
+        professionals = professionals.filter(id__in=professional_ids)
+    
+    by_professional = {
+        row['booking__professional_id']: (row['total'], row['count'])
+        for row in totals.values('booking__professional_id').annotate(total=Sum('rating'), count=Count('id'))
+    }
+    
+    changed = []
+    for professional in professionals.iterator(chunk_size=batch_size):
+        rating_sum, rating_count = by_professional.get(professional.id, (0, 0))
+        average = (Decimal(rating_sum) / rating_count).quantize(Decimal('0.01')) if rating_count else Decimal('0.00')
+        if (professional.rating_sum, professional.rating_count, professional.average_rating) != (rating_sum, rating_count, average):
+            professional.rating_sum = rating_sum
+            professional.rating_count = rating_count
+            professional.average_rating = average
+            changed.append(professional)
+    
+    Professional.objects.bulk_update(changed, ['rating_sum', 'rating_count', 'average_rating'], batch_size=batch_size)
+    
+    from services.search_index import sync_professional_stats
+    sync_professional_stats([professional.id for professional in changed])
+    return len(changed)
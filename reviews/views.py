@@ -4,7 +4,6 @@ from django.views.decorators.http import require_http_methods
 from .models import Review
 from .forms import ReviewForm
 from bookings.models import Booking
-from accounts.models import Client
 
 
 @require_http_methods(["GET", "POST"])
@@ -18,8 +17,8 @@ def create_review(request, booking_id):
         return redirect('home')
     
     # Check if user is logged in as the client who made the booking
-    client_id = request.session.get('client_id')
-    if not client_id or client_id != booking.client.id:
+    client = request.actor.client
+    if client is None or client.id != booking.client_id:
         messages.warning(request, 'Por favor, faça login com o número de telefone usado na reserva para avaliar.')
         # Store booking_id in session to redirect after login
         request.session['review_booking_id'] = booking_id
@@ -28,7 +27,7 @@ def create_review(request, booking_id):
     # Check if review already exists
     if hasattr(booking, 'review'):
         messages.info(request, 'Você já avaliou esta reserva.')
-        return redirect('accounts:professional_profile', pk=booking.professional.id)
+        return redirect('accounts:professional_profile', pk=booking.professional_id)
     
     if request.method == 'POST':
         form = ReviewForm(request.POST)
@@ -40,7 +39,7 @@ def create_review(request, booking_id):
             messages.success(request, 'Obrigado pela sua avaliação!')
             # Clear review_booking_id from session if exists
             request.session.pop('review_booking_id', None)
-            return redirect('accounts:professional_profile', pk=booking.professional.id)
+            return redirect('accounts:professional_profile', pk=booking.professional_id)
     else:
         form = ReviewForm()
     
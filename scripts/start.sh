@@ -210,6 +210,23 @@ else
     # Não sai, continua - o servidor já está rodando
 fi
 
+# Tabela da cache partilhada (core.cache.TwoTierCache), não faz nada se já existir
+python manage.py createcachetable 2>/dev/null || echo "⚠️  Erro ao criar tabela da cache, continuando..."
+
+# Garante que o índice de pesquisa de profissionais está completo
+echo "🔎 Reconstruindo índice de pesquisa..."
+python manage.py rebuild_search_index 2>/dev/null || echo "⚠️  Erro ao reconstruir índice de pesquisa, continuando..."
+
+# Inicia o worker da fila de emails em background (emails são enfileirados pelas views)
+echo "📧 Iniciando worker de emails..."
+nohup python manage.py send_queued_emails --loop > /tmp/email_worker.log 2>&1 &
+echo "   Worker de emails iniciado (PID: $!)"
+
+# Inicia o worker das tarefas em segundo plano (renditions de imagens, etc.)
+echo "⚙️  Iniciando worker de tarefas..."
+nohup python manage.py run_worker > /tmp/job_worker.log 2>&1 &
+echo "   Worker de tarefas iniciado (PID: $!)"
+
 # Carrega dados iniciais (fixtures) apenas se não existirem
 echo "📋 Verificando dados iniciais..."
 if python manage.py shell -c "
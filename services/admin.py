@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from django.db.models import Count
 from .models import ServiceCategory, ServiceSubcategory, ProfessionalService
 
 
@@ -17,6 +18,9 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     inlines = [ServiceSubcategoryInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_subcategory_count=Count('subcategories'))
+    
     def icon_preview(self, obj):
         icon_url = obj.get_icon_url()
         return format_html(
@@ -26,8 +30,9 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
     icon_preview.short_description = 'Ícone'
     
     def subcategory_count(self, obj):
-        return obj.subcategories.count()
+        return obj._subcategory_count
     subcategory_count.short_description = 'Subcategorias'
+    subcategory_count.admin_order_field = '_subcategory_count'
 
 
 @admin.register(ServiceSubcategory)
@@ -35,11 +40,13 @@ class ServiceSubcategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'is_active', 'sort_order']
     list_filter = ['category', 'is_active']
     search_fields = ['name', 'category__name', 'description']
+    list_select_related = ['category']
 
 
 @admin.register(ProfessionalService)
 class ProfessionalServiceAdmin(admin.ModelAdmin):
-    list_display = ['professional', 'category', 'subcategory', 'base_price', 'is_active']
+    list_display = ['professional', 'category', 'subcategory', 'base_price', 'duration_minutes', 'is_active']
     list_filter = ['category', 'subcategory', 'is_active', 'created_at']
     search_fields = ['professional__name', 'category__name', 'description']
     readonly_fields = ['created_at', 'updated_at']
+    list_select_related = ['professional', 'category', 'subcategory']
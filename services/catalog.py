@@ -0,0 +1,67 @@
+"""
+In-process cache of the active ServiceCategory catalog.
+
+Categories are loaded with one query, tasks and icon URLs are precomputed,
+and the list is kept in memory until the catalog version changes
+(core.cache.VersionedLoader: the version is bumped by the post_save/post_delete
+signals of ServiceCategory and ServiceSubcategory, SERVICE_CATALOG_TTL bounds
+the copy when the shared cache is per-process), so pages built from the
+catalog run no queries while it is warm. The in-memory search index (see
+services.category_search) is built with it.
+"""
+from django.db import connection
+
+from core.cache import VersionedLoader
+
+from .category_search import InvertedIndex, search_category_ids_postgres
+from .models import ServiceCategory
+
+
+VERSION_KEY = 'services:catalog:version'
+MAX_TASKS = 8
+
+
+def _load_categories():
+    categories = list(ServiceCategory.objects.filter(is_active=True).order_by('sort_order', 'name'))
+    for category in categories:
+        keywords = category.search_keywords or ''
+        category.tasks = [task.strip() for task in keywords.split(',') if task.strip()][:MAX_TASKS]
+        category.icon = category.get_icon_url()
+    return categories
+
+
+def _load_catalog():
+    categories = _load_categories()
+    return categories, InvertedIndex(categories)
+
+
+catalog = VersionedLoader(VERSION_KEY, _load_catalog, 'SERVICE_CATALOG_TTL')
+
+
+def active_categories():
+    """Active categories in display order (shared instances, don't modify them)"""
+    return catalog.get()[0]
+
+
+def get_category(slug):
+    """Active category by slug (None if it doesn't exist or is inactive)"""
+    for category in active_categories():
+        if category.slug == slug:
+            return category
+    return None
+
+
+def search_categories(query):
+    """Active categories matching the query (accent-insensitive, best ranked first)"""
+    categories, index = catalog.get()
+    if connection.vendor == 'postgresql':
+        ids = search_category_ids_postgres(query)
+    else:
+        ids = index.search(query)
+    by_id = {category.id: category for category in categories}
+    return [by_id[category_id] for category_id in ids if category_id in by_id]
+
+
+def category_choices():
+    """(id, name) choices for forms, in display order"""
+    return [(category.id, category.name) for category in active_categories()]
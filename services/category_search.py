@@ -0,0 +1,115 @@
+"""
+Full-text search of service categories (home page search).
+
+On PostgreSQL the query runs against a weighted tsvector over name (A),
+search_keywords (B) and description (C) using the pt_unaccent configuration
+(Portuguese stemming + unaccent), served by the GIN expression index created
+in migration services 0005 and ranked with ts_rank.
+
+Other databases (SQLite in development) use an in-memory inverted index built
+with the category catalog, with the same weights and accent folding.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from .models import ServiceCategory
+
+
+# Must stay identical to the expression of the GIN index (migration services 0005)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('pt_unaccent', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(search_keywords, '')), 'B') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(description, '')), 'C')"
+)
+
+# Same defaults ts_rank uses for the A, B and C weights
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'search_keywords': 0.4,
+    'description': 0.2,
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def fold(text):
+    """Lowercase and strip accents ("Canalização" -> "canalizacao")"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text):
+    return WORD_RE.findall(fold(text))
+
+
+def to_prefix_tsquery(query):
+    """Every word of the query must match, as a prefix (search-as-you-type)"""
+    return ' & '.join(f'{word}:*' for word in WORD_RE.findall(query))
+
+
+def search_category_ids_postgres(query):
+    """Ids of matching active categories, best ranked first (PostgreSQL)"""
+    tsquery = to_prefix_tsquery(query)
+    if not tsquery:
+        return []
+    return list(
+        ServiceCategory.objects.filter(is_active=True)
+        # Same expression as the GIN index (see SEARCH_VECTOR_SQL), filtered on directly so no "= true" is added
+        .filter(RawSQL(f"({SEARCH_VECTOR_SQL}) @@ to_tsquery('pt_unaccent', %s)", [tsquery], output_field=BooleanField()))
+        .annotate(rank=RawSQL(f"ts_rank({SEARCH_VECTOR_SQL}, to_tsquery('pt_unaccent', %s))", [tsquery]))
+        .order_by('-rank', 'sort_order', 'name')
+        .values_list('id', flat=True)
+    )
+
+
+class InvertedIndex:
+    """Token -> {category id: weight} postings, with prefix lookups over the sorted vocabulary"""
+
+    def __init__(self, categories):
+        postings = defaultdict(dict)
+        for category in categories:
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(getattr(category, field)):
+                    entry = postings[token]
+                    entry[category.id] = entry.get(category.id, 0) + weight
+        self.postings = dict(postings)
+        self.vocabulary = sorted(self.postings)
+        # Ties keep the catalog order
+        self.position = {category.id: i for i, category in enumerate(categories)}
+
+    def _prefix_scores(self, term):
+        scores = {}
+        start = bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            for category_id, weight in self.postings[token].items():
+                scores[category_id] = scores.get(category_id, 0) + weight
+        return scores
+
+    def search(self, query):
+        """Ids of categories matching every word of the query, best ranked first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for term in terms:
+            term_scores = self._prefix_scores(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    category_id: score + term_scores[category_id]
+                    for category_id, score in scores.items()
+                    if category_id in term_scores
+                }
+            if not scores:
+                return []
+
+        return sorted(scores, key=lambda category_id: (-scores[category_id], self.position[category_id]))
@@ -0,0 +1,25 @@
+"""
+Comando Django para reconstruir o índice de pesquisa de profissionais
+Normalmente o índice é mantido pelos signals; use este comando após importações em massa
+ou alterações feitas com queryset.update()
+Execute: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from services.search_index import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de pesquisa de profissionais (categoria × localização)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Número de profissionais processados por lote',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Reconstruindo índice de pesquisa...')
+        total = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Índice reconstruído: {total} entradas'))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+        ('accounts', '0008_make_iban_optional'),
+        ('services', '0003_alter_servicecategory_icon_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfessionalSearchIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('average_rating', models.DecimalField(decimal_places=2, default=0.0, max_digits=3)),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_index_entries', to='services.servicecategory')),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.city')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_index_entries', to='accounts.professional')),
+                ('province', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.province')),
+            ],
+            options={
+                'verbose_name': 'Índice de Pesquisa',
+                'verbose_name_plural': 'Índice de Pesquisa',
+                'indexes': [models.Index(fields=['category', 'province', 'city', '-average_rating', '-completed_bookings'], name='search_idx_by_rating'), models.Index(fields=['category', 'province', 'city', '-completed_bookings', '-average_rating'], name='search_idx_by_bookings'), models.Index(fields=['category', 'province', 'city', 'name'], name='search_idx_by_name'), models.Index(fields=['professional'], name='search_idx_professional')],
+            },
+        ),
+    ]
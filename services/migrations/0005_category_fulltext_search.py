@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+# Must stay identical to services.category_search.SEARCH_VECTOR_SQL, otherwise
+# PostgreSQL won't use the expression index for the search query.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('pt_unaccent', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(search_keywords, '')), 'B') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(description, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """Portuguese, accent-insensitive text search configuration and GIN index (PostgreSQL only)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    schema_editor.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese);
+                ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+            END IF;
+        END
+        $$
+    """)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS services_category_search_gin '
+        f'ON services_servicecategory USING GIN (({SEARCH_VECTOR_SQL}))'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS services_category_search_gin')
+    schema_editor.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_professionalsearchindex'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
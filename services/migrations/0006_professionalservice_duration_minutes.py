@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_category_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='professionalservice',
+            name='duration_minutes',
+            field=models.PositiveSmallIntegerField(default=60, help_text='Tempo reservado na agenda por marcação', verbose_name='Duração (minutos)'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:37
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_entries(apps, schema_editor):
+    """Keep one row per professional, category and scope (duplicates left by concurrent reindexes)"""
+    ProfessionalSearchIndex = apps.get_model('services', 'ProfessionalSearchIndex')
+    
+    duplicates = ProfessionalSearchIndex.objects.values(
+        'professional_id', 'category_id', 'province_id', 'city_id'
+    ).annotate(keep=Min('id'), count=Count('id')).filter(count__gt=1)
+    for row in duplicates:
+        ProfessionalSearchIndex.objects.filter(
+            professional_id=row['professional_id'],
+            category_id=row['category_id'],
+            province_id=row['province_id'],
+            city_id=row['city_id'],
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_professionalservice_duration_minutes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='professionalsearchindex',
+            constraint=models.UniqueConstraint(condition=models.Q(('city__isnull', True), ('province__isnull', True)), fields=('professional', 'category'), name='search_idx_unique_anywhere'),
+        ),
+        migrations.AddConstraint(
+            model_name='professionalsearchindex',
+            constraint=models.UniqueConstraint(condition=models.Q(('city__isnull', True), ('province__isnull', False)), fields=('professional', 'category', 'province'), name='search_idx_unique_province'),
+        ),
+        migrations.AddConstraint(
+            model_name='professionalsearchindex',
+            constraint=models.UniqueConstraint(condition=models.Q(('city__isnull', False)), fields=('professional', 'category', 'province', 'city'), name='search_idx_unique_city'),
+        ),
+    ]
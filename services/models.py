@@ -1,6 +1,52 @@
 from django.db import models
 
 
+# Ícones SVG locais por slug (usados quando a categoria não tem icon_url)
+CATEGORY_ICONS = {
+    # Serviços Domésticos
+    'trabalhadora-domestica': 'images/icons/domestic-worker.svg',
+    'limpeza': 'images/icons/cleaning.svg',
+    'montagem-moveis': 'images/icons/furniture.svg',
+    'montagem-parede': 'images/icons/wall-mount.svg',
+    'pintura': 'images/icons/cleaning.svg',
+    'jardinagem': 'images/icons/cleaning.svg',
+    'vidraceiro': 'images/icons/wall-mount.svg',
+    'pavimentos-azulejos': 'images/icons/furniture.svg',
+    'reparacao-portas-janelas': 'images/icons/wall-mount.svg',
+    
+    # Reparações e Instalações
+    'reparacao-computador': 'images/icons/computer.svg',
+    'mecanico': 'images/icons/mechanic.svg',
+    'canalizacao': 'images/icons/plumbing.svg',
+    'eletrico': 'images/icons/electrical.svg',
+    'serralharia': 'images/icons/plumbing.svg',
+    'carpintaria': 'images/icons/furniture.svg',
+    'instalacao-ar-condicionado': 'images/icons/electrical.svg',
+    'instalacao-eletrodomesticos': 'images/icons/electrical.svg',
+    
+    # Mudanças e Transporte
+    'mudancas': 'images/icons/moving.svg',
+    'carregamento-transporte': 'images/icons/moving.svg',
+    'embalagem-desembalagem': 'images/icons/moving.svg',
+    'entrega-compras': 'images/icons/moving.svg',
+    'remocao-lixo': 'images/icons/cleaning.svg',
+    
+    # Serviços Digitais
+    'programacao-ti': 'images/icons/computer.svg',
+    'design-grafico': 'images/icons/computer.svg',
+    'marketing-digital': 'images/icons/computer.svg',
+    'influenciador': 'images/icons/computer.svg',
+    'fotografia-video': 'images/icons/computer.svg',
+    
+    # Outros Serviços
+    'assistente-pessoal': 'images/icons/domestic-worker.svg',
+    'seguranca-protecao': 'images/icons/electrical.svg',
+    'organizacao-eventos': 'images/icons/cleaning.svg',
+}
+
+DEFAULT_CATEGORY_ICON = 'images/icons/cleaning.svg'
+
+
 class ServiceCategory(models.Model):
     """Main service categories (e.g., Cleaning, Plumbing)"""
     name = models.CharField(max_length=200)
@@ -30,49 +76,7 @@ class ServiceCategory(models.Model):
             return self.icon_url
         
         # Caso contrário, usa ícone SVG local (sempre disponível)
-        icon_map = {
-            # Serviços Domésticos
-            'trabalhadora-domestica': 'images/icons/domestic-worker.svg',
-            'limpeza': 'images/icons/cleaning.svg',
-            'montagem-moveis': 'images/icons/furniture.svg',
-            'montagem-parede': 'images/icons/wall-mount.svg',
-            'pintura': 'images/icons/cleaning.svg',
-            'jardinagem': 'images/icons/cleaning.svg',
-            'vidraceiro': 'images/icons/wall-mount.svg',
-            'pavimentos-azulejos': 'images/icons/furniture.svg',
-            'reparacao-portas-janelas': 'images/icons/wall-mount.svg',
-            
-            # Reparações e Instalações
-            'reparacao-computador': 'images/icons/computer.svg',
-            'mecanico': 'images/icons/mechanic.svg',
-            'canalizacao': 'images/icons/plumbing.svg',
-            'eletrico': 'images/icons/electrical.svg',
-            'serralharia': 'images/icons/plumbing.svg',
-            'carpintaria': 'images/icons/furniture.svg',
-            'instalacao-ar-condicionado': 'images/icons/electrical.svg',
-            'instalacao-eletrodomesticos': 'images/icons/electrical.svg',
-            
-            # Mudanças e Transporte
-            'mudancas': 'images/icons/moving.svg',
-            'carregamento-transporte': 'images/icons/moving.svg',
-            'embalagem-desembalagem': 'images/icons/moving.svg',
-            'entrega-compras': 'images/icons/moving.svg',
-            'remocao-lixo': 'images/icons/cleaning.svg',
-            
-            # Serviços Digitais
-            'programacao-ti': 'images/icons/computer.svg',
-            'design-grafico': 'images/icons/computer.svg',
-            'marketing-digital': 'images/icons/computer.svg',
-            'influenciador': 'images/icons/computer.svg',
-            'fotografia-video': 'images/icons/computer.svg',
-            
-            # Outros Serviços
-            'assistente-pessoal': 'images/icons/domestic-worker.svg',
-            'seguranca-protecao': 'images/icons/electrical.svg',
-            'organizacao-eventos': 'images/icons/cleaning.svg',
-        }
-        
-        icon_path = icon_map.get(self.slug, 'images/icons/cleaning.svg')  # fallback
+        icon_path = CATEGORY_ICONS.get(self.slug, DEFAULT_CATEGORY_ICON)
         return static(icon_path)
 
 
@@ -102,6 +106,7 @@ class ProfessionalService(models.Model):
     subcategory = models.ForeignKey(ServiceSubcategory, on_delete=models.SET_NULL, null=True, blank=True)
     description = models.TextField()
     base_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, help_text="Preço base em AOA")
+    duration_minutes = models.PositiveSmallIntegerField(default=60, verbose_name="Duração (minutos)", help_text="Tempo reservado na agenda por marcação")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -115,3 +120,61 @@ class ProfessionalService(models.Model):
     def __str__(self):
         service_name = self.subcategory.name if self.subcategory else self.category.name
         return f"{self.professional.name} - {service_name}"
+
+
+class ProfessionalSearchIndex(models.Model):
+    """
+    Denormalized listing index for category/location searches.
+    
+    One row per professional × active category × coverage scope:
+    - province and city empty: the professional offers the category anywhere (category-wide row)
+    - province set, city empty: the professional works in that province
+    - province and city set: the professional works in that city (professionals without
+      specific cities get one row for every city of their provinces)
+    
+    Only activated, non-blocked professionals are indexed, so listings can filter on a
+    single (category, province, city) tuple without joins or DISTINCT.
+    Maintained by services.signals and the rebuild_search_index command.
+    """
+    professional = models.ForeignKey('accounts.Professional', on_delete=models.CASCADE, related_name='search_index_entries')
+    category = models.ForeignKey(ServiceCategory, on_delete=models.CASCADE, related_name='search_index_entries')
+    province = models.ForeignKey('locations.Province', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    city = models.ForeignKey('locations.City', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    
+    # Denormalized from Professional (for filtering and ordering)
+    name = models.CharField(max_length=200)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    completed_bookings = models.IntegerField(default=0)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Índice de Pesquisa"
+        verbose_name_plural = "Índice de Pesquisa"
+        indexes = [
+            models.Index(fields=['category', 'province', 'city', '-average_rating', '-completed_bookings'], name='search_idx_by_rating'),
+            models.Index(fields=['category', 'province', 'city', '-completed_bookings', '-average_rating'], name='search_idx_by_bookings'),
+            models.Index(fields=['category', 'province', 'city', 'name'], name='search_idx_by_name'),
+            models.Index(fields=['professional'], name='search_idx_professional'),
+        ]
+        # One row per scope (NULLs never conflict in a plain unique constraint, hence one per scope kind)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['professional', 'category'],
+                condition=models.Q(province__isnull=True, city__isnull=True),
+                name='search_idx_unique_anywhere',
+            ),
+            models.UniqueConstraint(
+                fields=['professional', 'category', 'province'],
+                condition=models.Q(province__isnull=False, city__isnull=True),
+                name='search_idx_unique_province',
+            ),
+            models.UniqueConstraint(
+                fields=['professional', 'category', 'province', 'city'],
+                condition=models.Q(city__isnull=False),
+                name='search_idx_unique_city',
+            ),
+        ]
+    
+    def __str__(self):
+        scope = self.city or self.province or 'Todas as áreas'
+        return f"{self.name} - {self.category} ({scope})"
@@ -0,0 +1,226 @@
+"""
+Maintenance and querying of the denormalized professional search index.
+
+See ProfessionalSearchIndex for the row layout. Every function here rebuilds rows
+from the source tables, so calling them more often than needed is always safe.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from accounts.cards import card_fields
+from accounts.models import Professional
+from core.page_cache import invalidate_pages
+from locations.models import City
+from .models import ProfessionalSearchIndex, ProfessionalService
+
+
+# Professional fields copied into the index (besides the coverage columns)
+DENORMALIZED_FIELDS = ['name', 'average_rating', 'completed_bookings', 'last_seen']
+
+# Keyset orderings of search results (see core.pagination), the last field makes every position unique
+PROFESSIONAL_ORDERINGS = {
+    'rating': ['-average_rating', '-completed_bookings', 'professional_id'],
+    'bookings': ['-completed_bookings', '-average_rating', 'professional_id'],
+    'name': ['name', 'professional_id'],
+}
+PROFESSIONALS_PER_PAGE = 12
+
+
+def _cities_by_province(province_ids=None):
+    """Map province id -> list of city ids"""
+    cities = City.objects.all()
+    if province_ids is not None:
+        cities = cities.filter(province_id__in=province_ids)
+
+    mapping = defaultdict(list)
+    for city_id, province_id in cities.values_list('id', 'province_id'):
+        mapping[province_id].append(city_id)
+    return mapping
+
+
+def _build_rows(professional, category_ids, province_ids, explicit_cities, cities_by_province):
+    """
+    Build index rows for one professional.
+
+    explicit_cities is a list of (city_id, province_id) tuples from service_cities.
+    If the professional has no specific cities, every city of the covered provinces is indexed
+    (same semantics as the old "service_cities = X OR service_cities IS NULL" filter).
+    """
+    stats = {field: getattr(professional, field) for field in DENORMALIZED_FIELDS}
+    province_ids = set(province_ids)
+
+    if explicit_cities:
+        city_scopes = [(city_id, province_id) for city_id, province_id in explicit_cities if province_id in province_ids]
+    else:
+        city_scopes = [
+            (city_id, province_id)
+            for province_id in province_ids
+            for city_id in cities_by_province.get(province_id, [])
+        ]
+
+    rows = []
+    for category_id in category_ids:
+        rows.append(ProfessionalSearchIndex(
+            professional_id=professional.id, category_id=category_id, **stats
+        ))
+        for province_id in province_ids:
+            rows.append(ProfessionalSearchIndex(
+                professional_id=professional.id, category_id=category_id, province_id=province_id, **stats
+            ))
+        for city_id, province_id in city_scopes:
+            rows.append(ProfessionalSearchIndex(
+                professional_id=professional.id, category_id=category_id,
+                province_id=province_id, city_id=city_id, **stats
+            ))
+    return rows
+
+
+def _active_category_ids(professional_ids):
+    """Map professional id -> set of active category ids they offer"""
+    mapping = defaultdict(set)
+    services = ProfessionalService.objects.filter(
+        professional_id__in=professional_ids,
+        is_active=True,
+        category__is_active=True,
+    ).values_list('professional_id', 'category_id')
+    for professional_id, category_id in services:
+        mapping[professional_id].add(category_id)
+    return mapping
+
+
+def _rows_for_professionals(professionals, cities_by_province=None):
+    """Build index rows for a batch of eligible professionals"""
+    professionals = list(professionals)
+    if not professionals:
+        return []
+
+    ids = [p.id for p in professionals]
+    categories = _active_category_ids(ids)
+
+    provinces = defaultdict(list)
+    for professional_id, province_id in Professional.service_provinces.through.objects.filter(
+        professional_id__in=ids
+    ).values_list('professional_id', 'province_id'):
+        provinces[professional_id].append(province_id)
+
+    cities = defaultdict(list)
+    for professional_id, city_id, province_id in Professional.service_cities.through.objects.filter(
+        professional_id__in=ids
+    ).values_list('professional_id', 'city_id', 'city__province_id'):
+        cities[professional_id].append((city_id, province_id))
+
+    if cities_by_province is None:
+        all_province_ids = {province_id for ids_ in provinces.values() for province_id in ids_}
+        cities_by_province = _cities_by_province(all_province_ids)
+
+    rows = []
+    for professional in professionals:
+        if not categories.get(professional.id):
+            continue
+        rows.extend(_build_rows(
+            professional,
+            categories[professional.id],
+            provinces.get(professional.id, []),
+            cities.get(professional.id, []),
+            cities_by_province,
+        ))
+    return rows
+
+
+def invalidate_category_pages(professional_ids, category_ids=()):
+    """Invalidate the cached category pages listing any of the professionals (see core.page_cache)"""
+    category_ids = set(category_ids) | set(
+        ProfessionalSearchIndex.objects.filter(professional_id__in=list(professional_ids))
+        .values_list('category_id', flat=True).distinct()
+    )
+    invalidate_pages(*(f'category:{category_id}' for category_id in category_ids))
+
+
+def _eligible_professionals():
+    return Professional.objects.filter(is_activated=True, is_blocked=False).only('id', *DENORMALIZED_FIELDS)
+
+
+def reindex_professionals(professional_ids):
+    """Rebuild the index rows of the given professionals"""
+    professional_ids = list(professional_ids)
+    if not professional_ids:
+        return
+
+    with transaction.atomic():
+        # Concurrent rebuilds of the same professionals run one after the other, so the
+        # second one deletes the rows of the first instead of inserting next to them
+        list(Professional.objects.select_for_update().filter(id__in=professional_ids).order_by('id').values_list('id'))
+        # Pages listing them before the rebuild (those listing them after are found by the new rows)
+        invalidate_category_pages(professional_ids)
+        ProfessionalSearchIndex.objects.filter(professional_id__in=professional_ids).delete()
+        rows = _rows_for_professionals(_eligible_professionals().filter(id__in=professional_ids))
+        ProfessionalSearchIndex.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        invalidate_category_pages([], {row.category_id for row in rows})
+
+
+def reindex_professional(professional_id):
+    """Rebuild the index rows of a single professional"""
+    reindex_professionals([professional_id])
+
+
+def sync_professional_stats(professional_ids):
+    """Copy denormalized fields (rating, bookings, last seen, name) without rebuilding coverage"""
+    professional_ids = list(professional_ids)
+    professionals = Professional.objects.filter(id__in=professional_ids).only('id', *DENORMALIZED_FIELDS)
+    for professional in professionals:
+        ProfessionalSearchIndex.objects.filter(professional_id=professional.id).update(
+            **{field: getattr(professional, field) for field in DENORMALIZED_FIELDS}
+        )
+    invalidate_category_pages(professional_ids)
+
+
+def rebuild_search_index(batch_size=200):
+    """Rebuild the whole index. Returns the number of rows written."""
+    cities_by_province = _cities_by_province()
+    total = 0
+
+    with transaction.atomic():
+        ProfessionalSearchIndex.objects.all().delete()
+
+        batch = []
+        for professional in _eligible_professionals().order_by('id').iterator(chunk_size=batch_size):
+            batch.append(professional)
+            if len(batch) >= batch_size:
+                rows = _rows_for_professionals(batch, cities_by_province)
+                ProfessionalSearchIndex.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+                total += len(rows)
+                batch = []
+
+        if batch:
+            rows = _rows_for_professionals(batch, cities_by_province)
+            ProfessionalSearchIndex.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+            total += len(rows)
+
+    invalidate_pages('catalog')
+    return total
+
+
+def search_professionals(category, province_id=None, city_id=None):
+    """
+    Index entries for professionals offering a category in a location.
+
+    A city is only considered together with its province (as in the booking wizard).
+    Each professional appears at most once, so no DISTINCT is needed.
+    """
+    entries = ProfessionalSearchIndex.objects.filter(category=category)
+    if province_id and city_id:
+        entries = entries.filter(province_id=province_id, city_id=city_id)
+    elif province_id:
+        entries = entries.filter(province_id=province_id, city__isnull=True)
+    else:
+        entries = entries.filter(province__isnull=True, city__isnull=True)
+    return entries
+
+
+def professional_card_rows(entries):
+    """
+    Project index rows onto the ordering columns and the card fields of their
+    professional (build the cards with accounts.cards.build_cards(rows, 'professional__'))
+    """
+    return entries.values('professional_id', 'name', 'average_rating', 'completed_bookings', *card_fields('professional__'))
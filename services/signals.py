@@ -0,0 +1,89 @@
+"""
+Signal handlers that keep ProfessionalSearchIndex, the category catalog and the
+cached public pages (core.page_cache) in sync with their source tables
+"""
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from accounts.models import Professional
+from core.page_cache import invalidate_pages
+from locations.models import City
+from .catalog import catalog
+from .models import ServiceCategory, ServiceSubcategory, ProfessionalService
+from .search_index import (
+    DENORMALIZED_FIELDS, invalidate_category_pages, reindex_professional, reindex_professionals, sync_professional_stats,
+)
+
+
+@receiver(post_save, sender=Professional)
+def professional_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    # Stats-only saves don't change coverage, just refresh the copied columns
+    if update_fields and set(update_fields) <= set(DENORMALIZED_FIELDS) | {'total_bookings', 'report_count'}:
+        sync_professional_stats([instance.id])
+        return
+    reindex_professional(instance.id)
+
+
+@receiver(pre_delete, sender=Professional)
+def professional_deleted(sender, instance, **kwargs):
+    # Their index rows go away with the cascade, find the pages listing them first
+    invalidate_category_pages([instance.id])
+
+
+@receiver(post_save, sender=ProfessionalService)
+@receiver(post_delete, sender=ProfessionalService)
+def professional_service_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    reindex_professional(instance.professional_id)
+
+
+@receiver(m2m_changed, sender=Professional.service_provinces.through)
+@receiver(m2m_changed, sender=Professional.service_cities.through)
+def professional_areas_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            reindex_professional(instance.id)
+        return
+    # Changed from the Province/City side: pk_set holds professional ids
+    if action == 'pre_clear':
+        # pk_set is not provided on clear, capture the affected professionals before the rows go away
+        instance._search_index_professional_ids = list(instance.professionals.values_list('id', flat=True))
+    elif action == 'post_clear':
+        reindex_professionals(getattr(instance, '_search_index_professional_ids', []))
+    else:
+        reindex_professionals(pk_set or [])
+
+
+@receiver(post_save, sender=ServiceCategory)
+def service_category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    # Activating/deactivating a category adds or removes its rows
+    professional_ids = ProfessionalService.objects.filter(category=instance).values_list('professional_id', flat=True)
+    reindex_professionals(set(professional_ids))
+
+
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_save, sender=ServiceSubcategory)
+@receiver(post_delete, sender=ServiceSubcategory)
+def catalog_changed(sender, **kwargs):
+    catalog.bump()
+    invalidate_pages('catalog')
+
+
+@receiver(post_save, sender=City)
+def city_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    # Professionals without specific cities cover every city of their provinces
+    professional_ids = Professional.objects.filter(
+        service_provinces=instance.province_id,
+        service_cities__isnull=True,
+    ).values_list('id', flat=True)
+    reindex_professionals(set(professional_ids))
@@ -1,37 +1,46 @@
-from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
-from .models import ServiceCategory, ProfessionalService
-from accounts.models import Professional
+from django.http import Http404
+from django.shortcuts import render
+from .catalog import active_categories, get_category
+from .search_index import PROFESSIONAL_ORDERINGS, PROFESSIONALS_PER_PAGE, professional_card_rows, search_professionals
+from accounts.cards import build_cards
+from accounts.presence import attach_presence
+from core.page_cache import cache_public_page
+from core.pagination import KeysetPaginator, cached_count, cursor_querystring
 
 
+@cache_public_page('catalog')
 def category_list(request):
     """List all service categories"""
-    categories = ServiceCategory.objects.filter(is_active=True).order_by('sort_order', 'name')
-    
-    # Process search_keywords for each category to create a list of tasks
-    for category in categories:
-        if category.search_keywords:
-            # Split by comma and clean up
-            category.tasks = [task.strip() for task in category.search_keywords.split(',') if task.strip()][:8]
-        else:
-            category.tasks = []
+    # Tasks (from search_keywords) and icons are precomputed by the catalog
+    categories = active_categories()
     
     return render(request, 'services/category_list.html', {
         'categories': categories
     })
 
 
+def _get_category_or_404(slug):
+    category = get_category(slug)
+    if category is None:
+        raise Http404('Categoria não encontrada')
+    return category
+
+
+def _category_page_tags(request, slug):
+    category = get_category(slug)
+    return [f'category:{category.id}'] if category else []
+
+
+@cache_public_page('catalog', _category_page_tags, timeout_setting='LISTING_PAGE_CACHE_TIMEOUT')
 def category_detail(request, slug):
     """Show category details and start booking"""
-    category = get_object_or_404(ServiceCategory, slug=slug, is_active=True)
+    category = _get_category_or_404(slug)
     
-    # Get professionals offering this service (not blocked)
-    professionals = Professional.objects.filter(
-        is_activated=True,
-        is_blocked=False,
-        professional_services__category=category,
-        professional_services__is_active=True
-    ).distinct()[:10]  # Limit to 10 for now
+    # Get professionals offering this service (index only holds activated, non-blocked professionals)
+    entries = professional_card_rows(search_professionals(category)).order_by(
+        '-average_rating', '-completed_bookings', 'professional_id'
+    )[:10]  # Limit to 10 for now
+    professionals = attach_presence(build_cards(entries, 'professional__'))
     
     return render(request, 'services/category_detail.html', {
         'category': category,
@@ -42,9 +51,8 @@ def category_detail(request, slug):
 def professionals_by_category(request, slug):
     """List professionals by category with filters"""
     from locations.models import Province, City
-    from django.db.models import Q
     
-    category = get_object_or_404(ServiceCategory, slug=slug, is_active=True)
+    category = _get_category_or_404(slug)
     
     # Get filter parameters
     province_id = request.GET.get('province')
@@ -52,41 +60,27 @@ def professionals_by_category(request, slug):
     min_rating = request.GET.get('min_rating')
     sort_by = request.GET.get('sort', 'rating')  # rating, bookings, name
     
-    # Base queryset
-    professionals = Professional.objects.filter(
-        is_activated=True,
-        is_blocked=False,
-        professional_services__category=category,
-        professional_services__is_active=True
-    ).distinct()
-    
-    # Apply location filters
-    if province_id:
-        professionals = professionals.filter(service_provinces__id=province_id)
-        
-        # If city is selected, show professionals in that city OR professionals without city restriction
-        if city_id:
-            professionals = professionals.filter(
-                Q(service_cities__id=city_id) | Q(service_cities__isnull=True)
-            ).distinct()
+    # Base queryset: one index row per professional for the selected location scope.
+    # If city is selected, the index already includes professionals without city restriction.
+    entries = search_professionals(category, province_id=province_id, city_id=city_id)
     
     # Apply rating filter
     if min_rating:
         try:
             min_rating_float = float(min_rating)
-            professionals = professionals.filter(average_rating__gte=min_rating_float)
+            entries = entries.filter(average_rating__gte=min_rating_float)
         except ValueError:
             pass
     
-    # Apply sorting
-    if sort_by == 'rating':
-        professionals = professionals.order_by('-average_rating', '-completed_bookings', 'name')
-    elif sort_by == 'bookings':
-        professionals = professionals.order_by('-completed_bookings', '-average_rating', 'name')
-    elif sort_by == 'name':
-        professionals = professionals.order_by('name')
-    else:
-        professionals = professionals.order_by('-average_rating', '-completed_bookings', 'name')
+    # Sorting + cursor pagination (the total is cached per filter combination)
+    if sort_by not in PROFESSIONAL_ORDERINGS:
+        sort_by = 'rating'
+    paginator = KeysetPaginator(
+        professional_card_rows(entries), PROFESSIONAL_ORDERINGS[sort_by], per_page=PROFESSIONALS_PER_PAGE
+    )
+    page = paginator.page(request.GET.get('cursor'))
+    professionals = attach_presence(build_cards(page, 'professional__'))
+    total_count = cached_count(entries, 'professionals_by_category')
     
     # Get provinces for filter dropdown
     provinces = Province.objects.all().order_by('name')
@@ -97,6 +91,10 @@ def professionals_by_category(request, slug):
     return render(request, 'services/professionals_list.html', {
         'category': category,
         'professionals': professionals,
+        'total_count': total_count,
+        'page': page,
+        'next_url': cursor_querystring(request, page.next_cursor) if page.has_next else None,
+        'previous_url': cursor_querystring(request, page.previous_cursor) if page.has_previous else None,
         'provinces': provinces,
         'cities': cities,
         'province_id': int(province_id) if province_id else None,